@@ -10,21 +10,32 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+import json
+from contextlib import contextmanager
+from copy import deepcopy
 from enum import Enum
-from time import sleep
+from functools import partial
+from os.path import dirname, join
+from threading import Event, Lock, RLock, Thread, Timer
+from time import monotonic
 
 from adapt.intent import IntentBuilder
 from ovos_bus_client import Message
-from ovos_backend_client.backends import BackendType, get_backend_type
-from ovos_backend_client.pairing import PairingManager, is_paired, check_remote_pairing
-from ovos_config.config import update_mycroft_config
-from ovos_plugin_manager.utils.ui import PluginUIHelper, PluginTypes
+from ovos_bus_client.message import dig_for_message
+from ovos_config.models import MycroftUserConfig
 from ovos_utils import classproperty
+from ovos_utils.json_helper import merge_dict
 from ovos_utils.log import LOG
 from ovos_utils.network_utils import is_connected
 from ovos_utils.process_utils import RuntimeRequirements
-from ovos_workshop.decorators import killable_event, intent_handler
+from ovos_workshop.decorators import intent_handler
 from ovos_workshop.skills import OVOSSkill
+from ovos_workshop.skills.base import is_classic_core
+
+from .outbound import RECORD_STOP, SPEECH_STOP, OutboundBus, killable_menu
+from .probes import ProbeCache
+from .timeline import SetupTimeline
+from .utils import append_jsonl, write_json_atomic
 
 
 class SetupState(str, Enum):
@@ -39,14 +50,68 @@ class SetupState(str, Enum):
     SELECTING_STT = "stt"
     SELECTING_TTS = "tts"
     PAIRING = "pairing"
+    PROVISIONING = "provisioning"
     FINISHED = "finished"
 
 
+# allowed transitions between setup states, the pairing intent can restart setup from anywhere
+_RESTART = {SetupState.SELECTING_BACKEND, SetupState.FINISHED, SetupState.INACTIVE}
+_ENGINE_MENUS = {SetupState.QUICK_ENGINE_CONFIG, SetupState.SELECTING_STT, SetupState.SELECTING_TTS}
+SETUP_TRANSITIONS = {
+    SetupState.LOADING: frozenset({SetupState.SELECTING_WIFI, SetupState.FIRST_BOOT,
+                                   SetupState.PROVISIONING} | _RESTART),
+    # a profile that can not be applied falls back to the wizard
+    SetupState.PROVISIONING: frozenset({SetupState.SELECTING_WIFI, SetupState.FIRST_BOOT} | _RESTART),
+    SetupState.SELECTING_WIFI: frozenset(_RESTART),
+    SetupState.FIRST_BOOT: frozenset(_RESTART),
+    SetupState.WELCOME: frozenset({SetupState.SELECTING_LANGUAGE} | _ENGINE_MENUS | _RESTART),
+    SetupState.SELECTING_LANGUAGE: frozenset(_ENGINE_MENUS | _RESTART),
+    SetupState.SELECTING_BACKEND: frozenset({SetupState.WELCOME, SetupState.SELECTING_LANGUAGE,
+                                             SetupState.PAIRING} | _ENGINE_MENUS | _RESTART),
+    SetupState.QUICK_ENGINE_CONFIG: frozenset({SetupState.SELECTING_STT, SetupState.SELECTING_TTS} | _RESTART),
+    SetupState.SELECTING_STT: frozenset({SetupState.QUICK_ENGINE_CONFIG, SetupState.SELECTING_TTS} | _RESTART),
+    SetupState.SELECTING_TTS: frozenset({SetupState.QUICK_ENGINE_CONFIG} | _RESTART),
+    SetupState.PAIRING: frozenset(_RESTART),
+    SetupState.FINISHED: frozenset({SetupState.SELECTING_BACKEND, SetupState.INACTIVE}),
+    SetupState.INACTIVE: frozenset({SetupState.SELECTING_BACKEND}),
+}
+
+# exit actions, killable menus that become stale when leaving a state
+STATE_EXIT_SIGNALS = {
+    SetupState.SELECTING_BACKEND: ("pairing.backend.menu.stop", "pairing.confirmation.stop"),
+    SetupState.QUICK_ENGINE_CONFIG: ("pairing.quick.engine.config.stop", "pairing.confirmation.stop"),
+    SetupState.SELECTING_STT: ("pairing.stt.menu.stop",),
+    SetupState.SELECTING_TTS: ("pairing.tts.menu.stop",),
+}
+
+# STT plugins that load a vosk model, see model_prefetch.py
+VOSK_PLUGINS = ("ovos-stt-plugin-vosk", "ovos-stt-plugin-vosk-streaming")
+# named values files backing PairingSkill._translate, loaded on first use
+TRANSLATION_FILES = {
+    "code": "code.spelling",
+    "backend": "options.backend",
+    "stt": "options.stt",
+    "tts": "options.tts",
+}
+
+
 class SetupManager:
     """ helper class to perform setup actions"""
 
-    def __init__(self, bus):
+    def __init__(self, bus, plugin_options=None, timeline=None, ranking=None):
         self.bus = bus
+        if plugin_options is None:
+            from .plugin_cache import PluginOptionsCache
+            plugin_options = PluginOptionsCache()
+        self.plugin_options = plugin_options
+        self.timeline = timeline
+        self.ranking = ranking  # EngineRanking, measured performance of installed plugins
+        self._pinned = set()  # options set explicitly, never replaced by ranked engines
+        self.configured_engines = {}  # "stt"/"tts" -> module written to mycroft.conf
+        self.vosk_model = None  # path of a prefetched vosk model
+        self._transaction_lock = RLock()
+        self._transaction_depth = 0
+        self._pending_config = {}
         # simplified voice only route
         self._offline_male = {
             "module": "ovos-tts-plugin-mimic",
@@ -112,76 +177,172 @@ class SetupManager:
 
     # options configuration
     def set_offline_stt_opt(self, module, config, fallback_module="", fallback_config=None):
+        self._pinned.add("offline_stt")
         self._offline_stt = {"module": module, "fallback_module": fallback_module, module: config}
         if fallback_module:
             self._offline_stt[fallback_module] = fallback_config or {}
 
     def set_online_stt_opt(self, module, config, fallback_module="", fallback_config=None):
+        self._pinned.add("online_stt")
         self._online_stt = {"module": module, "fallback_module": fallback_module, module: config}
         if fallback_module:
             self._online_stt[fallback_module] = fallback_config or {}
 
     def set_offline_male_opt(self, module, config):
+        self._pinned.add("offline_male")
         self._offline_male = {"module": module, module: config}
 
     def set_offline_female_opt(self, module, config):
+        self._pinned.add("offline_female")
         self._offline_female = {"module": module, module: config}
 
     def set_online_male_opt(self, module, config):
+        self._pinned.add("online_male")
         self._online_male = {"module": module, module: config}
 
     def set_online_female_opt(self, module, config):
+        self._pinned.add("online_female")
         self._online_female = {"module": module, module: config}
 
+    def pick_engine(self, plugin_type, options, offline=None, gender=None):
+        """ first option of the fastest benchmarked engine among options that
+        fits this device, None if no candidate was ranked"""
+        if self.ranking is None:
+            return None
+        candidates = [o for o in options
+                      if (offline is None or o.get("offline") == offline)
+                      and (gender is None or o.get("gender") == gender)]
+        best = self.ranking.best(plugin_type, {o["engine"] for o in candidates})
+        return next((o for o in candidates if o["engine"] == best), None)
+
+    def rank_defaults(self, stt_options=None, tts_options=None):
+        """ replace the hardcoded simplified voice route engines with the
+        fastest installed ones, options set from skill settings are kept"""
+        from ovos_plugin_manager.utils.ui import PluginTypes
+        slots = [("offline_stt", PluginTypes.STT, stt_options, True, None),
+                 ("online_stt", PluginTypes.STT, stt_options, False, None),
+                 ("offline_male", PluginTypes.TTS, tts_options, True, "male"),
+                 ("offline_female", PluginTypes.TTS, tts_options, True, "female"),
+                 ("online_male", PluginTypes.TTS, tts_options, False, "male"),
+                 ("online_female", PluginTypes.TTS, tts_options, False, "female")]
+        for slot, plugin_type, options, offline, gender in slots:
+            if slot in self._pinned or not options:
+                continue
+            opt = self.pick_engine(plugin_type, options, offline, gender)
+            if opt is None:
+                continue
+            cfg = self.plugin_options.option2config(opt, plugin_type)
+            cfg.pop("meta", None)
+            current = getattr(self, f"_{slot}")
+            setattr(self, f"_{slot}", {**current, "module": opt["engine"], opt["engine"]: cfg})
+
+    def set_vosk_model(self, path, stt_config=None):
+        """ use an already unpacked vosk model for every vosk option,
+        stt_config is the current "stt" section of mycroft.conf, it is
+        updated if it selects vosk without a model"""
+        self.vosk_model = path
+        for opt in (self._offline_stt, self._online_stt):
+            for module in VOSK_PLUGINS:
+                if module in opt:
+                    opt[module] = dict(opt[module] or {}, model=path)
+        stt_config = stt_config or {}
+        missing = {module: {"model": path}
+                   for module in (stt_config.get("module"), stt_config.get("fallback_module"))
+                   if module in VOSK_PLUGINS and not (stt_config.get(module) or {}).get("model")}
+        if missing:
+            self.update_config({"stt": missing})
+
     # config handling
+    @contextmanager
+    def transaction(self):
+        """ batch config changes made inside this context, they are merged
+        in memory and committed with a single file write and a single
+        reload notification when the outermost transaction exits"""
+        with self._transaction_lock:
+            self._transaction_depth += 1
+            try:
+                yield self
+            except Exception:
+                if self._transaction_depth == 1:
+                    LOG.error("setup transaction failed, config changes discarded")
+                    self._pending_config = {}
+                raise
+            finally:
+                self._transaction_depth -= 1
+            if self._transaction_depth == 0 and self._pending_config:
+                config, self._pending_config = self._pending_config, {}
+                self._commit(config)
+
+    def update_config(self, config):
+        with self._transaction_lock:
+            if self._transaction_depth:
+                merge_dict(self._pending_config, deepcopy(config))
+                return
+        self._commit(config)
+
+    def _commit(self, config):
+        start = monotonic()
+        conf = MycroftUserConfig()
+        conf.merge(config)
+        # written in place under the ovos_config lock, readers wait for it and
+        # the config file watchers of the services fire, a rename would not
+        conf.store()
+        for kind in ("stt", "tts"):
+            module = config.get(kind, {}).get("module")
+            if module:
+                self.configured_engines[kind] = module
+        # inform all Configuration objects connected to the bus
+        self.bus.emit(Message("configuration.patch", {"config": config}))
+        if self.timeline:
+            self.timeline.record("config", "update", start, sections=sorted(config))
+
     def change_tts(self, opt):
+        from ovos_plugin_manager.utils.ui import PluginTypes
         tts_module = opt["engine"]
         if "plugin_type" not in opt:
             opt["plugin_type"] = PluginTypes.TTS
-        cfg = PluginUIHelper.option2config(opt, PluginTypes.TTS)
+        cfg = self.plugin_options.option2config(opt, PluginTypes.TTS)
         # plugins report an extra "meta" key for UI consumption, filter it
         if "meta" in cfg:
             cfg.pop("meta")
         tts_cfg = {"module": tts_module,
                    tts_module: cfg}
-        update_mycroft_config({"tts": tts_cfg}, bus=self.bus)
+        self.update_config({"tts": tts_cfg})
 
     def change_stt(self, opt):
+        from ovos_plugin_manager.utils.ui import PluginTypes
         stt_module = opt["engine"]
         if "plugin_type" not in opt:
             opt["plugin_type"] = PluginTypes.STT
-        cfg = PluginUIHelper.option2config(opt, PluginTypes.STT)
+        cfg = self.plugin_options.option2config(opt, PluginTypes.STT)
         # plugins report an extra "meta" key for UI consumption, filter it
         if "meta" in cfg:
             cfg.pop("meta")
+        if stt_module in VOSK_PLUGINS and self.vosk_model:
+            cfg.setdefault("model", self.vosk_model)
         stt_cfg = {"module": stt_module, stt_module: cfg}
-        update_mycroft_config({"stt": stt_cfg}, bus=self.bus)
+        self.update_config({"stt": stt_cfg})
 
     def change_to_offline_male(self):
-        update_mycroft_config({"tts": self._offline_male},
-                              bus=self.bus)
+        self.update_config({"tts": self._offline_male})
 
     def change_to_online_male(self):
-        update_mycroft_config({"tts": self._online_male},
-                              bus=self.bus)
+        self.update_config({"tts": self._online_male})
 
     def change_to_online_female(self):
-        update_mycroft_config({"tts": self._online_female},
-                              bus=self.bus)
+        self.update_config({"tts": self._online_female})
 
     def change_to_offline_female(self):
-        update_mycroft_config({"tts": self._offline_female},
-                              bus=self.bus)
+        self.update_config({"tts": self._offline_female})
 
     def change_to_online_stt(self):
-        update_mycroft_config({"stt": self._online_stt},
-                              bus=self.bus)
+        self.update_config({"stt": self._online_stt})
 
     def change_to_offline_stt(self):
-        update_mycroft_config({"stt": self._offline_stt},
-                              bus=self.bus)
+        self.update_config({"stt": self._offline_stt})
 
     def change_to_local_backend(self, url="http://0.0.0.0:6712"):
+        from ovos_backend_client.backends import BackendType
         config = {
             "stt": {"module": "ovos-stt-plugin-selene"},
             "server": {
@@ -195,26 +356,77 @@ class SetupManager:
                 }
             }
         }
-        update_mycroft_config(config, bus=self.bus)
+        self.update_config(config)
 
     def change_to_no_backend(self):
+        from ovos_backend_client.backends import BackendType
         config = {
             "server": {
                 "backend_type": BackendType.OFFLINE.value
             }
         }
-        update_mycroft_config(config, bus=self.bus)
+        self.update_config(config)
+
+    def apply_profile(self, profile):
+        """ configure everything a validated provisioning profile
+        determines with a single config commit, see provisioning.py"""
+        from ovos_backend_client.backends import BackendType
+        with self.transaction():
+            self.update_config({"lang": profile["lang"]})
+            backend = profile["backend"]
+            if backend["type"] == BackendType.PERSONAL:
+                self.change_to_local_backend(backend["url"])
+            else:
+                self.change_to_no_backend()
+            # named presets are the simplified voice route
+            if isinstance(profile["stt"], str):
+                getattr(self, f"change_to_{profile['stt']}_stt")()
+            else:
+                self.update_config({"stt": profile["stt"]})
+            if isinstance(profile["tts"], str):
+                getattr(self, f"change_to_{profile['tts']}")()
+            else:
+                self.update_config({"tts": profile["tts"]})
 
 
 class PairingSkill(OVOSSkill):
+    settings_debounce = 3  # seconds to wait for more changes before writing settings to disk
+    speech_timeout = 30  # max seconds to wait for speech to end before continuing setup
+    code_repeat = 60  # seconds between repeating the pairing code while waiting for activation
+    timeline_history = 20  # setup runs kept in setup_timeline.jsonl
 
     def __init__(self, *args, **kwargs):
         self.reload_skill = False
+        self._settings_timer = None
+        self._settings_dirty = False
+        self._settings_store_lock = Lock()
+        self._continuations = {}  # Timer -> SetupState it was scheduled in
+        self._continuations_lock = Lock()
+        self._pairing_failed = False
+        self._pending_restart = None
         self.translations = dict()
         self.setup = None
         self.pairing = None
+        self.activation = None
+        self._code_shown = 0
+        self.backend_sessions = None
+        self.plugin_options = None
+        self.plugin_health = None
+        self.engine_ranking = None
+        self.warmup = None
+        self.model_prefetch = None
+        self._model_status = None  # last reported (lang, state, percent)
         self.mycroft_ready = False
         self._state = SetupState.LOADING
+        self._state_lock = RLock()
+        self._state_entered = monotonic()
+        self.timeline = SetupTimeline()
+        self.probes = None
+        self._wizard_lock = Lock()
+        self._gui_batch_lock = RLock()
+        self._gui_batch_depth = 0
+        self._gui_dirty = False
+        self.state_durations = {}  # SetupState -> total seconds spent in that state
         self.selected_language = None
 
         super().__init__(*args, **kwargs)
@@ -231,8 +443,231 @@ class PairingSkill(OVOSSkill):
                                    no_network_fallback=True,
                                    no_gui_fallback=True)
 
+    # messagebus
+    def bind(self, bus):
+        """ everything the skill emits goes through an OutboundBus,
+        see outbound.py """
+        if bus and not isinstance(bus, OutboundBus):
+            bus = OutboundBus(bus)
+        super().bind(bus)
+
+    def send_stop_signal(self, stop_event=None):
+        """ OVOSSkill.send_stop_signal, but the forwarded stop event goes
+        through OutboundBus.emit_stop, it is dropped for menus that are not
+        running and coalesced when repeated"""
+        waiter = Event()
+        msg = dig_for_message() or Message("mycroft.stop")
+        # stop event execution
+        if stop_event:
+            self.bus.emit_stop(msg.forward(stop_event))
+
+        # stop TTS
+        self.bus.emit(msg.forward(SPEECH_STOP))
+
+        # Tell ovos-core to stop recording (not in mycroft-core)
+        self.bus.emit(msg.forward(RECORD_STOP))
+
+        # special non-ovos handling
+        if is_classic_core():
+            # NOTE: mycroft does not have an event to stop recording
+            # this attempts to force a stop by sending silence to end STT step
+            self.bus.emit(Message('mycroft.mic.mute'))
+            waiter.wait(1.5)  # the silence from muting should make STT stop recording
+            self.bus.emit(Message('mycroft.mic.unmute'))
+
+        waiter.wait(0.5)  # if TTS had not yet started
+        self.bus.emit(msg.forward(SPEECH_STOP))
+
+    def handle_get_bus_stats(self, message):
+        self.bus.emit(message.reply("ovos.setup.bus.stats", self.bus.stats()))
+
     # startup
     def initialize(self):
+        self.probes = ProbeCache(timeline=self.timeline)
+
+        self.add_event("mycroft.not.paired", self.not_paired)
+        self.add_event("ovos.setup.state.get", self.handle_get_setup_state)
+        self.add_event("ovos.setup.bus.stats.get", self.handle_get_bus_stats)
+        # the backend (or a bridge to it) announces that a pairing code was entered
+        self.add_event("ovos.setup.pairing.activated", self.handle_activation_wake)
+        self.add_event("mycroft.ready", self.handle_rank_engines)
+
+        if self.is_setup_complete():
+            # the wizard is loaded only if setup is triggered again,
+            # by the pairing intent or by mycroft.not.paired
+            LOG.info("setup already completed, skipping setup wizard")
+            Thread(target=self._update_version, daemon=True).start()
+            self.end_setup(True)
+            return
+
+        # fleet images ship a profile instead of running the wizard
+        if self.provision():
+            return
+
+        # network probes run in the background while the wizard loads
+        self.start_probes()
+        self.load_wizard()
+        self._init_state()
+
+    @property
+    def setup_marker_path(self):
+        return join(self.file_system.path, "setup_complete.json")
+
+    def _setup_marker(self):
+        # raw config values, resolving the backend type imports every backend
+        server = self.config_core.get("server", {})
+        return {"backend_type": server.get("backend_type", ""),
+                "url": server.get("url", ""),
+                "uuid": self._identity_uuid()}
+
+    @staticmethod
+    def _identity_uuid():
+        """ uuid in the local identity file, "" if the device was never paired
+        or the identity was deleted """
+        from ovos_backend_client.identity import IdentityManager
+        try:
+            with open(IdentityManager.IDENTITY_FILE, encoding="utf-8") as f:
+                return json.load(f).get("uuid") or ""
+        except (OSError, ValueError, AttributeError):
+            return ""
+
+    def is_setup_complete(self):
+        """ cheap check made on every boot, True if a previous setup finished
+        for the backend that is still configured, no network involved """
+        if self.settings.get("first_setup", True):
+            return False
+        try:
+            with open(self.setup_marker_path, encoding="utf-8") as f:
+                marker = json.load(f)
+        except (OSError, ValueError):
+            return False
+        current = self._setup_marker()
+        # the device has to be paired with the identity setup finished with
+        if not current["uuid"]:
+            return False
+        return all(marker.get(k) == v for k, v in current.items())
+
+    @property
+    def provisioning_profile_path(self):
+        from .provisioning import PROFILE_FILE
+        return join(dirname(self._settings_path), PROFILE_FILE)
+
+    def provision(self):
+        """ headless setup from the provisioning profile, no GUI pages and
+        no dialogs, False if there is no profile or it could not be applied
+        and the wizard needs to run """
+        from .plugin_health import find_entry_point
+        from .provisioning import load_profile
+        try:
+            profile = load_profile(self.provisioning_profile_path)
+        except ValueError as e:
+            LOG.error(f"invalid provisioning profile, running setup wizard: {e}")
+            self.bus.emit(Message("ovos.setup.provisioning.failed", {"error": str(e)}))
+            return False
+        if profile is None or not self.transition(SetupState.PROVISIONING):
+            return False
+        LOG.info(f"provisioning from {self.provisioning_profile_path}")
+        try:
+            for kind in ("stt", "tts"):
+                module = profile[kind].get("module") if isinstance(profile[kind], dict) else None
+                if module and not find_entry_point(module, f"mycroft.plugin.{kind}"):
+                    raise ValueError(f"{kind} plugin {module} is not installed")
+            # the wizard objects are not needed, only the voice route presets
+            with self.timeline.measure("provisioning", "apply"):
+                self._init_setup_options()
+                # nothing is committed to mycroft.conf unless the backend activates
+                with self.setup.transaction():
+                    self.setup.apply_profile(profile)
+                    login = self._activate_backend(profile["backend"])
+        except Exception as e:
+            LOG.error(f"provisioning failed, running setup wizard: {e}")
+            self.bus.emit(Message("ovos.setup.provisioning.failed", {"error": str(e)}))
+            return False
+
+        if login:
+            self.bus.emit(Message("mycroft.paired", login))
+        lang = profile["lang"]
+        self.selected_language = lang.split("-")[0]
+        region = lang.split("-")[1].upper() if "-" in lang else ""
+        self.bus.emit(Message("system.configure.language",
+                              {"code": self.selected_language,
+                               "language_code": f"{self.selected_language}_{region}".rstrip("_")}))
+        self.settings["pairing_url"] = profile["backend"].get("url", "")
+        self.settings["selected_stt"] = self.setup.configured_engines.get("stt")
+        self.settings["selected_tts"] = self.setup.configured_engines.get("tts")
+        self.store_settings()
+        self.end_setup(success=True)
+        return True
+
+    def _activate_backend(self, backend):
+        """ headless counterpart of the pairing flow, personal backends
+        activate a device as soon as it asks for a code, returns the
+        identity of a personal backend """
+        from uuid import uuid4
+        from ovos_backend_client.api import DeviceApi
+        from ovos_backend_client.backends import BackendType
+        from ovos_backend_client.identity import IdentityManager
+        uuid = str(uuid4())
+        if backend["type"] == BackendType.PERSONAL:
+            api = self._pooled(DeviceApi(backend["url"], backend_type=BackendType.PERSONAL))
+            data = api.get_code(uuid)
+            login = api.activate(uuid, data.get("token"))
+            if not login:
+                raise ValueError("Received empty identity data!")
+            IdentityManager.save(login)
+            return login
+        DeviceApi("http://127.0.0.1", backend_type=BackendType.OFFLINE).activate(uuid, "123ABC")
+        return None
+
+    def _pooled(self, api):
+        """ send the requests of a DeviceApi over the keep-alive session of its backend """
+        if self.backend_sessions is None:
+            from .backend_session import BackendSessions
+            self.backend_sessions = BackendSessions(**self.settings.get("backend_http", {}))
+        return self.backend_sessions.bind(api)
+
+    def _check_remote_pairing(self):
+        """ check_remote_pairing(ignore_errors=True) over the pooled session """
+        from ovos_backend_client.api import DeviceApi
+        try:
+            return bool(self._pooled(DeviceApi()).get())
+        except Exception as e:
+            LOG.warning(f"Could not get device info: {e}")
+            return False
+
+    def _update_version(self):
+        from ovos_backend_client.api import DeviceApi
+        try:
+            DeviceApi().update_version()
+        except Exception as e:
+            LOG.warning(f"Failed to report version to backend: {e}")
+
+    def load_wizard(self):
+        """ create everything the setup wizard needs, done once """
+        with self._wizard_lock:
+            if self.pairing is not None:
+                return
+            self._load_wizard()
+
+    def _load_wizard(self):
+        # the pairing and plugin UI machinery is only imported if the wizard runs
+        from ovos_backend_client.pairing import PairingManager
+        from .activation import ActivationScheduler
+        from .plugin_cache import PluginOptionsCache
+        from .plugin_health import PluginHealth
+        from .plugin_ranking import EngineRanking
+
+        # plugins that fail to load are never offered, see PluginHealth
+        self.plugin_health = PluginHealth(join(dirname(self._settings_path),
+                                               "plugin_health.json"))
+        # discovered plugins are persisted across boots, see PluginOptionsCache
+        self.plugin_options = PluginOptionsCache(join(dirname(self._settings_path),
+                                                      "plugin_catalog.json"),
+                                                 timeline=self.timeline,
+                                                 health=self.plugin_health)
+        # benchmark results used to pick default engines, see plugin_ranking.py
+        if self.engine_ranking is None:
+            self.engine_ranking = EngineRanking(self.engine_ranking_path)
         self.pairing = PairingManager(self.bus,
                                       code_callback=self.on_pairing_code,
                                       success_callback=self.on_pairing_success,
@@ -241,21 +676,24 @@ class PairingSkill(OVOSSkill):
                                       restart_callback=self.handle_pairing,
                                       error_callback=self.on_pairing_error)
         self._init_setup_options()
+        # polls for activation instead of the fixed PairingManager timer, see activation.py
+        self.activation = ActivationScheduler(self._poll_activation,
+                                              **self.settings["activation_polling"])
 
         # set default language
         self.selected_language = self.lang.split("-")[0].lower()
         if self.selected_language not in [l["code"] for l in self.settings["langs"]]:
             LOG.warning(f"Default language is not available in {self.skill_id}")
             self.selected_language = "en"
-
-        self.add_event("mycroft.not.paired", self.not_paired)
-        self.add_event("ovos.setup.state.get", self.handle_get_setup_state)
+        self.prefetch_plugin_options()
+        self.prefetch_stt_model()
 
         # events for GUI interaction
         self.gui.register_handler("mycroft.device.set.backend", self.handle_backend_selected_event)
         self.gui.register_handler("mycroft.device.confirm.backend", self.handle_backend_confirmation_event)
         self.gui.register_handler("mycroft.device.local.setup.host.address", self.handle_personal_backend_url)
         self.gui.register_handler("mycroft.return.select.backend", self.handle_return_event)
+        self.gui.register_handler("mycroft.device.pairing.confirm", self.handle_activation_wake)
         self.gui.register_handler("mycroft.device.confirm.stt", self.handle_stt_selected)
         self.gui.register_handler("mycroft.device.confirm.tts", self.handle_tts_selected)
         self.gui.register_handler("mycroft.device.confirm.language", self.handle_language_selected)
@@ -265,17 +703,12 @@ class PairingSkill(OVOSSkill):
         self.gui.register_handler("mycroft.device.quick.setup.confirm", self.handle_customize_engines_continue)
         self.gui.register_handler("mycroft.device.stt.tts.menu.back", self.handle_stt_tts_list_back)
 
-        # translations
-        self.translations["code"] = self.translate_namedvalues("code.spelling")
-        self.translations["backend"] = self.translate_namedvalues("options.backend")
-        self.translations["stt"] = self.translate_namedvalues("options.stt")
-        self.translations["tts"] = self.translate_namedvalues("options.tts")
-
-        self._init_state()
-
     def _init_setup_options(self):
+        from ovos_plugin_manager.utils.ui import PluginTypes
         # distros/images can customize setup by placing a json file in skill settings XDG location
-        self.setup = SetupManager(self.bus)
+        self.setup = SetupManager(self.bus, self.plugin_options, self.timeline,
+                                  ranking=self.engine_ranking)
+        defaults = deepcopy(dict(self.settings))
 
         # configure setup steps based on skill settings, this allows distros to skip some aspects of setup
         if "enable_language_selection" not in self.settings:
@@ -287,6 +720,26 @@ class PairingSkill(OVOSSkill):
         if "enable_tts_selection" not in self.settings:
             self.settings["enable_tts_selection"] = True
 
+        # download the vosk model for the setup language in the background,
+        # "vosk_models" maps a language to {"url", "md5"/"sha256"} and may point at a local file
+        if "prefetch_stt_model" not in self.settings:
+            self.settings["prefetch_stt_model"] = True
+        if "vosk_models" not in self.settings:
+            self.settings["vosk_models"] = {}
+        # prime the model files of newly selected engines while skills load, see warmup.py
+        if "warmup_engines" not in self.settings:
+            self.settings["warmup_engines"] = True
+        # connect/read timeouts of the keep-alive backend sessions, see backend_session.py
+        if "backend_http" not in self.settings:
+            self.settings["backend_http"] = {"connect_timeout": 3.05, "read_timeout": 15}
+        # activation polls after the pairing code is shown, see activation.py
+        if "activation_polling" not in self.settings:
+            self.settings["activation_polling"] = {"initial": 1, "factor": 2,
+                                                   "max_interval": 30, "jitter": 0.25}
+        # benchmark installed STT/TTS plugins in the background once the device is idle
+        if "rank_engines" not in self.settings:
+            self.settings["rank_engines"] = False
+
         if "preferred_tts_engine" not in self.settings:
             self.settings["preferred_tts_engine"] = ""
         if "preferred_stt_engine" not in self.settings:
@@ -315,46 +768,119 @@ class PairingSkill(OVOSSkill):
                 {"name": "Dutch", "code": "nl", "system_code": "nl_NL"}
             ]
 
-        # read default plugins for simplified voice route from settings
-        # TODO - validate that these are in fact installed
-        # TODO - parse default value from OPM sorted list,
-        #  should ensure "best installed" plugin is used
-        if self.settings.get("offline_stt"):
+        # read default plugins for simplified voice route from settings,
+        # the others are replaced by the fastest installed plugins, see rank_defaults
+        if self._plugin_setting("offline_stt", PluginTypes.STT):
             engine = self.settings.get("offline_stt")
             fallback = self.settings.get("offline_fallback_stt")
             cfg = self.settings.get("offline_stt_cfg")
             fallback_cfg = self.settings.get("offline_fallback_stt_cfg")
             self.setup.set_offline_stt_opt(engine, cfg, fallback, fallback_cfg)
-        if self.settings.get("online_stt"):
+        if self._plugin_setting("online_stt", PluginTypes.STT):
             engine = self.settings.get("online_stt")
             fallback = self.settings.get("online_fallback_stt")
             cfg = self.settings.get("online_stt_cfg")
             fallback_cfg = self.settings.get("online_fallback_stt_cfg")
             self.setup.set_online_stt_opt(engine, cfg, fallback, fallback_cfg)
-        if self.settings.get("online_male"):
+        if self._plugin_setting("online_male", PluginTypes.TTS):
             engine = self.settings.get("online_male")
             cfg = self.settings.get("online_male_cfg")
             self.setup.set_online_male_opt(engine, cfg)
-        if self.settings.get("online_female"):
+        if self._plugin_setting("online_female", PluginTypes.TTS):
             engine = self.settings.get("online_female")
             cfg = self.settings.get("online_female_cfg")
             self.setup.set_online_female_opt(engine, cfg)
-        if self.settings.get("offline_male"):
+        if self._plugin_setting("offline_male", PluginTypes.TTS):
             engine = self.settings.get("offline_male")
             cfg = self.settings.get("offline_male_cfg")
             self.setup.set_offline_male_opt(engine, cfg)
-        if self.settings.get("offline_female"):
+        if self._plugin_setting("offline_female", PluginTypes.TTS):
             engine = self.settings.get("offline_female")
             cfg = self.settings.get("offline_female_cfg")
             self.setup.set_offline_female_opt(engine, cfg)
 
+        if dict(self.settings) != defaults:
+            self.store_settings()
+
+    @property
+    def engine_ranking_path(self):
+        return join(dirname(self._settings_path), "engine_ranking.json")
+
+    def _plugin_setting(self, key, plugin_type):
+        """ plugin configured in skill settings, None if unset or not installed"""
+        from .plugin_health import find_entry_point
+        engine = self.settings.get(key)
+        if engine and not find_entry_point(engine, plugin_type):
+            LOG.warning(f"{key} plugin {engine} is not installed, using default")
+            return None
+        return engine
+
+    def prefetch_plugin_options(self):
+        # start plugin discovery in the background, STT/TTS menus render from cache
+        self.plugin_options.prefetch(self.selected_language,
+                                     stt_blacklist=self.settings["stt_blacklist"],
+                                     stt_preferred=self.settings["preferred_stt_engine"],
+                                     tts_blacklist=self.settings["tts_blacklist"],
+                                     tts_preferred=self.settings["preferred_tts_engine"],
+                                     stt=self.settings["enable_stt_selection"],
+                                     tts=self.settings["enable_tts_selection"])
+
+    def prefetch_stt_model(self):
+        """ start fetching the vosk model for selected_language, only if a
+        vosk plugin is installed, progress is reported by _on_model_progress"""
+        from .plugin_health import find_entry_point
+        if not self.settings.get("prefetch_stt_model", True):
+            return
+        if not any(find_entry_point(module, "mycroft.plugin.stt") for module in VOSK_PLUGINS):
+            return
+        if self.model_prefetch is None:
+            from .model_prefetch import VoskModelPrefetch
+            self.model_prefetch = VoskModelPrefetch(models=self.settings.get("vosk_models"),
+                                                    callback=self._on_model_progress)
+        # vosk models are per dialect, prefer the full system code of the selected language
+        lang = next((l["system_code"] for l in self.settings["langs"]
+                     if l["code"] == self.selected_language), self.selected_language)
+        self.model_prefetch.start(lang)
+
+    def _on_model_progress(self, lang, state, progress=None):
+        if state == "ready":
+            self.setup.set_vosk_model(progress, self.config_core.get("stt", {}))
+            percent = 100
+        else:
+            percent = int(progress * 100) if progress is not None else -1
+        status = (lang, state, percent)
+        if status == self._model_status:
+            return  # download chunks only report whole percent changes
+        self._model_status = status
+        self.bus.emit(Message("ovos.setup.model.progress",
+                              {"lang": lang, "state": state, "progress": percent}))
+        with self.gui_batch() as gui:
+            gui["model_state"] = state
+            gui["model_progress"] = percent
+
+    def start_probes(self):
+        """ check connectivity and pairing concurrently, results are
+        collected (and cached for a short while) by is_online / is_paired """
+        from ovos_backend_client.pairing import is_paired
+        self.probes.submit("connected", is_connected)
+        self.probes.submit("paired", is_paired)
+
+    def is_online(self):
+        return self.probes.get("connected", is_connected)
+
+    def is_paired(self):
+        from ovos_backend_client.pairing import is_paired
+        return self.probes.get("paired", is_paired)
+
     def _init_state(self):
         self.first_setup = self.settings.get("first_setup", True)
         # uncomment this line for debugging
         # will always trigger setup on boot
         # self.first_setup = True
 
-        if not is_connected():
+        # render something while the probes are still running
+        self.handle_display_manager("LoadingScreen")
+        if not self.is_online():
             self.state = SetupState.SELECTING_WIFI
             # trigger pairing after wifi
             self.bus.once("ovos.wifi.setup.completed",
@@ -365,7 +891,7 @@ class PairingSkill(OVOSSkill):
             self.state = SetupState.FIRST_BOOT
             self.make_active()  # to enable converse
             self.bus.emit(Message("mycroft.not.paired"))
-        elif not is_paired():
+        elif not self.is_paired():
             # trigger pairing
             self.state = SetupState.SELECTING_BACKEND
             self.bus.emit(Message("mycroft.not.paired"))
@@ -374,13 +900,123 @@ class PairingSkill(OVOSSkill):
             self.pairing.api.update_version()
             self.end_setup(True)
 
+    # settings persistence
+    def store_settings(self):
+        """ mark settings as dirty, they are written to disk once after
+        settings_debounce seconds without further changes"""
+        with self._settings_store_lock:
+            self._settings_dirty = True
+            if self._settings_timer:
+                self._settings_timer.cancel()
+            self._settings_timer = Timer(self.settings_debounce, self.flush_settings)
+            self._settings_timer.daemon = True
+            self._settings_timer.start()
+
+    def flush_settings(self):
+        """ write pending settings changes to disk now """
+        with self._settings_store_lock:
+            if self._settings_timer:
+                self._settings_timer.cancel()
+                self._settings_timer = None
+            if not self._settings_dirty:
+                return
+            self._settings_dirty = False
+            try:
+                # same format as JsonStorage.store, but never leaves a truncated file behind
+                write_json_atomic(self.settings.path, dict(self.settings),
+                                  indent=4, ensure_ascii=False)
+            except Exception as e:
+                LOG.error(f"Failed to store settings: {e}")
+                self._settings_dirty = True
+
+    # non blocking flow
+    def schedule_continuation(self, delay, callback, *args):
+        """ run callback after delay seconds, instead of sleeping in a bus handler """
+
+        def _run():
+            with self._continuations_lock:
+                self._continuations.pop(timer, None)
+            try:
+                callback(*args)
+            except Exception as e:
+                LOG.exception(f"setup continuation failed: {e}")
+
+        timer = Timer(delay, _run)
+        timer.daemon = True
+        with self._continuations_lock:
+            self._continuations[timer] = self.state
+        timer.start()
+        return timer
+
+    def cancel_continuations(self, state=None):
+        """ cancel pending continuations, only those scheduled in state if given """
+        with self._continuations_lock:
+            timers = [t for t, s in self._continuations.items()
+                      if state is None or s == state]
+            for timer in timers:
+                self._continuations.pop(timer)
+        for timer in timers:
+            timer.cancel()
+
+    def speak_dialog_then(self, key, data=None, callback=None):
+        """ speak a dialog and call callback once speech ended,
+        equivalent to speak_dialog(wait=True) without blocking the caller"""
+        done = Lock()
+        start = monotonic()
+
+        def _continue(message=None):
+            if not done.acquire(blocking=False):
+                return  # already handled, by speech end or by timeout
+            self.bus.remove("recognizer_loop:audio_output_end", _continue)
+            timeout.cancel()
+            self.timeline.record("speech", key, start, timeout=message is None)
+            if callback:
+                callback()
+
+        self.bus.once("recognizer_loop:audio_output_end", _continue)
+        # do not stall setup if the audio service never reports end of speech
+        timeout = self.schedule_continuation(self.speech_timeout, _continue)
+        self.speak_dialog(key, data)
+
+    def speak_dialog(self, key, data=None, expect_response=False, wait=False):
+        if not wait:
+            return super().speak_dialog(key, data, expect_response, wait)
+        with self.timeline.measure("speech", key):
+            return super().speak_dialog(key, data, expect_response, wait)
+
+    def handle_rank_engines(self, message=None):
+        """ first idle, benchmark installed STT/TTS plugins so setup can
+        default to the fastest ones, results are reused per plugin version"""
+        if not self.settings.get("rank_engines"):
+            return
+        from ovos_plugin_manager.utils.ui import PluginTypes
+        from .plugin_ranking import EngineRanking
+        if self.engine_ranking is None:
+            self.engine_ranking = EngineRanking(self.engine_ranking_path)
+        ranking, lang = self.engine_ranking, self.lang
+
+        def _rank():
+            try:
+                for plugin_type in (PluginTypes.STT, PluginTypes.TTS):
+                    ranking.benchmark_all(plugin_type, lang)
+            except Exception as e:
+                LOG.error(f"Failed to benchmark plugins: {e}")
+
+        Thread(target=_rank, daemon=True).start()
+
     def _translate(self, section: str, key: str = None):
+        # most boots never speak a pairing code, read the .value files lazily
+        lang = self.lang
+        if (lang, section) not in self.translations:
+            self.translations[(lang, section)] = self.translate_namedvalues(
+                TRANSLATION_FILES[section]) if section in TRANSLATION_FILES else {}
         if key is None:
-            return self.translations.get(section, {})
-        return self.translations.get(section, {}).get(key, "")
+            return self.translations[(lang, section)]
+        return self.translations[(lang, section)].get(key, "")
 
     @property
     def backend_type(self):
+        from ovos_backend_client.backends import get_backend_type
         return get_backend_type(self.config_core)
 
     @property
@@ -390,7 +1026,7 @@ class PairingSkill(OVOSSkill):
     @selected_backend.setter
     def selected_backend(self, value):
         self.settings["selected_backend"] = value
-        self.settings.store()
+        self.store_settings()
 
     @property
     def selected_stt(self):
@@ -399,7 +1035,7 @@ class PairingSkill(OVOSSkill):
     @selected_stt.setter
     def selected_stt(self, value):
         self.settings["selected_stt"] = value
-        self.settings.store()
+        self.store_settings()
 
     @property
     def selected_tts(self):
@@ -408,7 +1044,7 @@ class PairingSkill(OVOSSkill):
     @selected_tts.setter
     def selected_tts(self, value):
         self.settings["selected_tts"] = value
-        self.settings.store()
+        self.store_settings()
 
     @property
     def state(self):
@@ -416,9 +1052,44 @@ class PairingSkill(OVOSSkill):
 
     @state.setter
     def state(self, value):
-        if value != self._state:
+        self.transition(value)
+
+    def transition(self, value) -> bool:
+        """ move the setup state machine to a new state,
+        returns False if the transition is not allowed from the current state"""
+        with self._state_lock:
+            old = self._state
+            if value == old:
+                return True
+            if value not in SETUP_TRANSITIONS[old]:
+                LOG.warning(f"Invalid setup transition: {old.value} -> {value}")
+                return False
+            now = monotonic()
+            duration = now - self._state_entered
             self._state = value
-            self.bus.emit(Message("ovos.setup.state", {"state": self._state}))
+            self._state_entered = now
+            self.state_durations[old] = self.state_durations.get(old, 0) + duration
+            self.timeline.record("state", old.value, now - duration, now)
+        LOG.debug(f"setup state: {old.value} -> {value.value} ({duration:.3f}s)")
+        self._on_state_exit(old)
+        self._on_state_enter(value, old, duration)
+        return True
+
+    def _on_state_exit(self, state):
+        # cancel stale work from the previous step
+        self.cancel_continuations(state)
+        signals = STATE_EXIT_SIGNALS.get(state)
+        if signals:
+            # NOTE: send_stop_signal blocks for a while waiting on TTS,
+            # killing the menu threads and their speech is enough here
+            for msg in signals:
+                self.bus.emit_stop(Message(msg))
+            self.bus.emit_stop(Message(SPEECH_STOP))
+
+    def _on_state_enter(self, state, previous, duration):
+        self.bus.emit(Message("ovos.setup.state", {"state": state,
+                                                   "previous": previous,
+                                                   "duration": duration}))
 
     @property
     def preferred_tts_engine(self):
@@ -430,11 +1101,14 @@ class PairingSkill(OVOSSkill):
 
     def handle_get_setup_state(self, message):
         self.bus.emit(message.reply("ovos.setup.state",
-                                    {"state": self.state}))
+                                    {"state": self.state,
+                                     "durations": {s.value: d for s, d in self.state_durations.items()}}))
 
     def handle_wifi_finish(self, message):
         self.handle_display_manager("LoadingScreen")
-        if not is_paired() or self.first_setup:
+        # connectivity changed, do not trust results from before the wifi setup
+        self.probes.invalidate()
+        if not self.is_paired() or self.first_setup:
             self.state = SetupState.SELECTING_BACKEND
             self.bus.emit(message.forward("mycroft.not.paired"))
         else:
@@ -449,12 +1123,18 @@ class PairingSkill(OVOSSkill):
         LOG.info("killing all dialogs")
 
     def not_paired(self, message):
+        self.load_wizard()
+        if self._pairing_failed:
+            # resume once the pairing failure has been reported to the user
+            self._pending_restart = message
+            return
         self.make_active()  # to enable converse
         # If the device isn't paired catch mycroft.ready to release gui
         self.bus.once("mycroft.ready", self.handle_mycroft_ready)
         if not message.data.get('quiet', True):
-            self.speak_dialog("pairing.not.paired", wait=True)
-        self.handle_pairing()
+            self.speak_dialog_then("pairing.not.paired", callback=self.handle_pairing)
+        else:
+            self.handle_pairing()
 
     def handle_mycroft_ready(self, message):
         """Catch info that skills are loaded and ready."""
@@ -463,20 +1143,25 @@ class PairingSkill(OVOSSkill):
         self.gui.remove_page("ProcessLoader")
         self.bus.emit(Message("mycroft.gui.screen.close",
                               {"skill_id": self.skill_id}))
-        self.state = SetupState.INACTIVE
+        # skills can finish loading mid wizard, do not leave the running setup
+        with self._state_lock:
+            if self.state in (SetupState.LOADING, SetupState.FINISHED):
+                self.state = SetupState.INACTIVE
 
     # voice events
     @intent_handler(IntentBuilder("PairingIntent")
                     .require("pairing").require("device"))
     def handle_pairing(self, message=None):
+        from ovos_backend_client.backends import BackendType
+        self.load_wizard()
         self.state = SetupState.SELECTING_BACKEND
         if message:  # intent
             if self.backend_type == BackendType.PERSONAL and \
-                    check_remote_pairing(ignore_errors=True):
+                    self.probes.get("remote_pairing", self._check_remote_pairing):
                 # Already paired!
                 self.show_pairing_success()
-                self.speak_dialog("pairing.already.paired", wait=True)
-                self.end_setup(success=True)
+                self.speak_dialog_then("pairing.already.paired",
+                                       callback=partial(self.end_setup, success=True))
                 return
 
         # trigger setup workflow
@@ -484,48 +1169,83 @@ class PairingSkill(OVOSSkill):
 
     # pairing callbacks
     def on_pairing_start(self):
-        self.state = SetupState.PAIRING
-        self.show_pairing_start()
+        if self.transition(SetupState.PAIRING):
+            self.show_pairing_start()
 
     def on_pairing_code(self, code):
+        self._code_shown = monotonic()
         data = {"code": '. '.join(map(self._translate("code").get, code)) + '.'}
         self.show_pairing(code)
-        self.speak_dialog("pairing.code", data, wait=True)
+        self.speak_dialog("pairing.code", data)
 
     def on_pairing_success(self):
+        self.activation.stop()
+        self.probes.invalidate("paired", "remote_pairing")
         self.show_pairing_success()
 
         if self.mycroft_ready:
             # Tell user they are now paired
-            self.speak_dialog("pairing.paired", wait=True)
+            self.speak_dialog_then("pairing.paired",
+                                   callback=self._linger_then_finish_pairing)
+        else:
+            self._linger_then_finish_pairing()
 
+    def _linger_then_finish_pairing(self):
         # allow gui page to linger around a bit
-        sleep(5)
+        self.schedule_continuation(5, self._finish_pairing)
+
+    def _finish_pairing(self):
         self.handle_display_manager("LoadingSkills")
         self.pairing.api.update_version()
         self.end_setup(success=True)
 
     def on_pairing_error(self, quiet):
+        # PairingManager restarts pairing right after this callback,
+        # not_paired waits for the failure to be reported
+        self._pairing_failed = True
         self.show_pairing_fail()
+        # allow gui page to linger around a bit
+        self.schedule_continuation(5, self._end_failed_pairing, quiet)
+
+    def _end_failed_pairing(self, quiet):
         if not quiet:
-            self.speak_dialog("error.unexpected.restarting", wait=True)
+            self.speak_dialog_then("error.unexpected.restarting",
+                                   callback=self._restart_failed_pairing)
+        else:
+            self._restart_failed_pairing()
+
+    def _restart_failed_pairing(self):
         self.end_setup(success=False)
+        self._pairing_failed = False
+        message, self._pending_restart = self._pending_restart, None
+        if message:
+            self.not_paired(message)
 
     def on_pairing_end(self, error_dialog):
         if error_dialog:
-            self.speak_dialog(error_dialog, wait=True)
-            self.end_setup(success=False)
+            self.speak_dialog_then(error_dialog,
+                                   callback=partial(self.end_setup, success=False))
         else:
             self.end_setup(success=True)
 
     # Pairing GUI events
     ### Language Selection & Welcome Screen
     def handle_welcome_screen(self):
-        self.state = SetupState.WELCOME
+        if not self.transition(SetupState.WELCOME):
+            return
         self.handle_display_manager("Welcome")
-        sleep(0.3)  # Wait for display to show the screen before speaking
-        self.speak_dialog("welcome.screen", wait=True)
-        sleep(0.3)  # Wait for display a bit before showing the next screen
+        # Wait for display to show the screen before speaking
+        self.schedule_continuation(0.3, self._speak_welcome)
+
+    def _speak_welcome(self):
+        # Wait for display a bit before showing the next screen
+        self.speak_dialog_then("welcome.screen",
+                               callback=partial(self.schedule_continuation, 0.3,
+                                                self._handle_welcome_done))
+
+    def _handle_welcome_done(self):
+        if self.state != SetupState.WELCOME:
+            return  # setup moved on while the welcome screen was showing
         lang_support_enabled = self.settings.get("enable_language_selection", False)
         if not lang_support_enabled:
             self.gui["language_selection_enabled"] = False
@@ -535,11 +1255,12 @@ class PairingSkill(OVOSSkill):
             self.handle_language_menu()
 
     def handle_language_menu(self):
-        self.state = SetupState.SELECTING_LANGUAGE
+        if not self.transition(SetupState.SELECTING_LANGUAGE):
+            return
         supported_languages = self.settings["langs"]
-        self.gui["supportedLanguagesModel"] = supported_languages
-        self.handle_display_manager("LanguageMenu")
-        self.speak_dialog("language.menu", wait=True)
+        self.handle_display_manager("LanguageMenu",
+                                    supportedLanguagesModel=supported_languages)
+        self.speak_dialog("language.menu")
 
     def handle_language_selected(self, message):
         self.selected_language = message.data["code"]
@@ -547,22 +1268,25 @@ class PairingSkill(OVOSSkill):
         self.bus.emit(Message("system.configure.language",
                               {"code": self.selected_language,
                                "language_code": system_code}))
+        self.prefetch_plugin_options()
+        self.prefetch_stt_model()
         self.handle_backend_menu()
 
     def handle_language_back_event(self, message):
         self.handle_language_menu()
 
     #### Backend selection menu
-    @killable_event(msg="pairing.backend.menu.stop")
+    @killable_menu(msg="pairing.backend.menu.stop")
     def handle_backend_menu(self):
         if not self.settings["enable_backend_selection"]:
-            if not is_paired():
+            if not self.is_paired():
                 self.handle_no_backend_selected(None)
             else:
                 self.handle_stt_menu()
             return
 
-        self.state = SetupState.SELECTING_BACKEND
+        if not self.transition(SetupState.SELECTING_BACKEND):
+            return
         self.send_stop_signal("pairing.confirmation.stop")
         self.handle_display_manager("BackendSelect")
         self.speak_dialog("backend.intro", wait=True)
@@ -578,9 +1302,10 @@ class PairingSkill(OVOSSkill):
         self.handle_backend_menu()
 
     ### Backend confirmation
-    @killable_event(msg="pairing.confirmation.stop",
-                    callback=handle_intent_aborted)
+    @killable_menu(msg="pairing.confirmation.stop",
+                   callback=handle_intent_aborted)
     def handle_backend_confirmation(self, selection):
+        from ovos_backend_client.backends import BackendType
         LOG.debug("Backend selected: " + selection)
         if selection not in (BackendType.OFFLINE,
                              BackendType.PERSONAL):
@@ -593,6 +1318,7 @@ class PairingSkill(OVOSSkill):
                           wait=True)
 
     def handle_backend_confirmation_event(self, message):
+        from ovos_backend_client.backends import BackendType
         self.send_stop_signal("pairing.confirmation.stop")
         if message.data["backend"] == BackendType.PERSONAL:
             self.handle_personal_backend_selected(message)
@@ -601,27 +1327,54 @@ class PairingSkill(OVOSSkill):
 
     def handle_personal_backend_selected(self, message):
         self.handle_display_manager("BackendPersonalHost")
-        self.speak_dialog("backend.personal.url.prompt", wait=True)
+        self.speak_dialog("backend.personal.url.prompt")
 
     def handle_personal_backend_url(self, message):
+        from ovos_backend_client.backends import BackendType
         host = message.data["host_address"]
         self.pairing.pairing_url = self.settings["pairing_url"] = host
-        # this will make a new DeviceApi object internally pointing to right url
+        self.store_settings()
+        # this will make a new DeviceApi object internally pointing to right url,
+        # it reuses the open connections to that host
         self.pairing.set_api_url(host, backend_type=BackendType.PERSONAL)
+        self._pooled(self.pairing.api)
+        self.probes.invalidate("paired", "remote_pairing")
         self.setup.change_to_local_backend(host)
         # continue to normal pairing process
         self.state = SetupState.PAIRING
-        # dont trigger loop
+        # activation is polled by self.activation, never by the PairingManager timer
         self.pairing.activator_cancelled = True
-        # auto-pair
+        self.activation.stop()
         self.pairing.kickoff_pairing()
-        self.pairing.check_for_activate()
-        self.pairing.activator_cancelled = False
+        if self.pairing.data:  # got a pairing code, personal backends usually activate it right away
+            self.activation.start()
+
+    def _poll_activation(self):
+        """ one activation poll, True once pairing is no longer waiting for it """
+        pairing = self.pairing
+        with pairing.counter_lock:
+            if pairing.data is None:  # pairing restarted or ended
+                return True
+            # PairingManager repeats the code on every 6th failed poll,
+            # polls are not evenly spaced, repeat it by time instead
+            due = monotonic() - self._code_shown >= self.code_repeat
+            pairing.count = 0 if due else 1
+        pairing.check_for_activate()
+        return pairing.data is None
+
+    def handle_activation_wake(self, message=None):
+        """ the code was entered on the backend, check for activation now """
+        if self.activation and self.activation.is_running:
+            self.activation.wake()
 
     def handle_no_backend_selected(self, message):
+        from ovos_backend_client.backends import BackendType
         self.pairing.pairing_url = self.settings["pairing_url"] = ""
+        self.store_settings()
         # this will make a new DeviceApi object internally pointing to right url
         self.pairing.set_api_url("127.0.0.1", backend_type=BackendType.OFFLINE)
+        self.probes.invalidate("paired", "remote_pairing")
+        self.activation.stop()
         self.pairing.data = None
         self.setup.change_to_no_backend()
         # auto pair
@@ -630,48 +1383,85 @@ class PairingSkill(OVOSSkill):
         self.handle_quick_engine_configuration()
 
     ### Quick engine configuration
-    @killable_event(msg="pairing.quick.engine.config.stop",
-                    callback=handle_intent_aborted)
+    @killable_menu(msg="pairing.quick.engine.config.stop",
+                   callback=handle_intent_aborted)
     def handle_quick_engine_configuration(self):
-        self.state = SetupState.QUICK_ENGINE_CONFIG
+        from ovos_plugin_manager.utils.ui import PluginTypes
+        if not self.transition(SetupState.QUICK_ENGINE_CONFIG):
+            return
         def_tts_engine = None
         def_stt_engine = None
+        # installed plugins, ranked by measured performance when benchmarks exist
+        stt_options, tts_options = self._ranking_candidates()
+        self.setup.rank_defaults(stt_options, tts_options)
 
         if self.preferred_tts_engine:
             def_tts_engine = self.preferred_tts_engine
         else:
-            try:
-                def_tts_engine = self.config_core["tts"]["module"]
-            except KeyError:
-                pass
+            fastest = self.setup.pick_engine(PluginTypes.TTS, tts_options)
+            if fastest:
+                def_tts_engine = fastest["engine"]
+            else:
+                try:
+                    def_tts_engine = self.config_core["tts"]["module"]
+                except KeyError:
+                    pass
 
         if self.preferred_stt_engine:
             def_stt_engine = self.preferred_stt_engine
         else:
-            try:
-                def_stt_engine = self.config_core["stt"]["module"]
-            except KeyError:
-                pass
+            fastest = self.setup.pick_engine(PluginTypes.STT, stt_options)
+            if fastest:
+                def_stt_engine = fastest["engine"]
+            else:
+                try:
+                    def_stt_engine = self.config_core["stt"]["module"]
+                except KeyError:
+                    pass
+
+        # do not suggest defaults that would fail to load after setup
+        if def_tts_engine and not self.plugin_health.check(def_tts_engine, PluginTypes.TTS):
+            def_tts_engine = None
+        if def_stt_engine and not self.plugin_health.check(def_stt_engine, PluginTypes.STT):
+            def_stt_engine = None
 
         if def_tts_engine and def_stt_engine:
-            self.gui["default_tts_engine"] = def_tts_engine
-            self.gui["default_stt_engine"] = def_stt_engine
-            self.handle_display_manager("DefaultsMenu")
+            self.handle_display_manager("DefaultsMenu",
+                                        default_tts_engine=def_tts_engine,
+                                        default_stt_engine=def_stt_engine)
             self.speak_dialog("quick.defaults.intro", wait=True)
         else:  # there is no preferred engine set in any of the config files, fallback to stt menu
             self.handle_stt_menu()
             self.send_stop_signal("pairing.quick.engine.config.stop")
 
+    def _ranking_candidates(self):
+        """ STT and TTS options offered by the menus, empty if nothing was benchmarked """
+        from ovos_plugin_manager.utils.ui import PluginTypes
+        if not self.engine_ranking or not self.engine_ranking.scores:
+            return [], []
+        # same cache keys as prefetch_plugin_options, served from memory
+        stt_options = self.plugin_options.get_config_options(self.selected_language, PluginTypes.STT,
+                                                             self.settings["stt_blacklist"],
+                                                             self.settings["preferred_stt_engine"])
+        menu = self.plugin_options.get_menu_options(self.selected_language, PluginTypes.TTS,
+                                                    self.settings["tts_blacklist"],
+                                                    self.settings["preferred_tts_engine"])
+        # per plugin lists are not truncated, every installed voice is a candidate
+        tts_options = [opt for plug in menu["plugins"] for opt in plug["options"]]
+        return stt_options, tts_options
+
     def handle_customize_engines_event(self, message):
         self.handle_stt_menu()
 
     def handle_customize_engines_back(self, message):
+        from ovos_backend_client.backends import BackendType
         self.handle_backend_confirmation(selection=BackendType.OFFLINE)
         self.send_stop_signal("pairing.quick.engine.config.stop")
 
     def handle_customize_engines_continue(self, message):
-        self.setup.change_stt({"engine": message.data.get("stt_engine")})
-        self.setup.change_tts({"engine": message.data.get("tts_engine")})
+        with self.setup.transaction():
+            self.setup.change_stt({"engine": message.data.get("stt_engine")})
+            self.setup.change_tts({"engine": message.data.get("tts_engine")})
         self.send_stop_signal("pairing.quick.engine.config.stop")
         self.end_setup(success=True)
 
@@ -679,9 +1469,10 @@ class PairingSkill(OVOSSkill):
         self.handle_quick_engine_configuration()
 
     ### STT selection
-    @killable_event(msg="pairing.stt.menu.stop",
-                    callback=handle_intent_aborted)
+    @killable_menu(msg="pairing.stt.menu.stop",
+                   callback=handle_intent_aborted)
     def handle_stt_menu(self):
+        from ovos_plugin_manager.utils.ui import PluginTypes
         if not self.settings["enable_stt_selection"]:
             if self.settings["enable_tts_selection"]:
                 self.handle_tts_menu()
@@ -689,14 +1480,13 @@ class PairingSkill(OVOSSkill):
                 self.end_setup(success=True)
             return
 
-        self.state = SetupState.SELECTING_STT
-        supported_stt_engines = PluginUIHelper.get_config_options(self.selected_language, PluginTypes.STT,
-                                                                  self.settings["stt_blacklist"],
-                                                                  self.settings["preferred_stt_engine"])
+        if not self.transition(SetupState.SELECTING_STT):
+            return
+        supported_stt_engines = self.plugin_options.get_config_options(self.selected_language, PluginTypes.STT,
+                                                                       self.settings["stt_blacklist"],
+                                                                       self.settings["preferred_stt_engine"])
         self.log.info("Supported STT engines: " + str(supported_stt_engines))
-        self.gui["stt_engines"] = supported_stt_engines
-        self.handle_display_manager("STTListMenu")
-        self.send_stop_signal("pairing.confirmation.stop")
+        self.handle_display_manager("STTListMenu", stt_engines=supported_stt_engines)
         self.speak_dialog("stt.intro", wait=True)
         self.speak_dialog("options.select.gui", wait=True)
 
@@ -707,39 +1497,38 @@ class PairingSkill(OVOSSkill):
         self.handle_tts_menu()
 
     ### TTS selection
-    @killable_event(msg="pairing.tts.menu.stop",
-                    callback=handle_intent_aborted)
+    @killable_menu(msg="pairing.tts.menu.stop",
+                   callback=handle_intent_aborted)
     def handle_tts_menu(self):
+        from ovos_plugin_manager.utils.ui import PluginTypes
         if not self.settings["enable_tts_selection"]:
             self.end_setup(success=True)
             return
 
-        self.state = SetupState.SELECTING_TTS
+        if not self.transition(SetupState.SELECTING_TTS):
+            return
 
         single = self.settings.get("single_tts_list")
-        opts = PluginUIHelper.get_config_options(self.selected_language, PluginTypes.TTS,
-                                                 self.settings["tts_blacklist"],
-                                                 self.settings["preferred_tts_engine"],
-                                                 max_opts=50)
-        plug_opts = PluginUIHelper.get_plugin_options(self.selected_language, PluginTypes.TTS)
-        if len(plug_opts) == 1:
+        # flat and per plugin lists come from the same plugin scan
+        menu = self.plugin_options.get_menu_options(self.selected_language, PluginTypes.TTS,
+                                                    self.settings["tts_blacklist"],
+                                                    self.settings["preferred_tts_engine"],
+                                                    max_opts=50)
+        if menu["plugin_count"] == 1:
             single = True  # only 1 plugin installed, skip plugin selection and show voices directly
 
         if single is None:
             # auto detect best display option
-            if len(opts) >= 25:
+            if menu["count"] >= 25:
                 single = False
             else:
                 single = True
 
-        self.gui["tts_engines"] = opts if single else plug_opts
-
         if single:
-            self.handle_display_manager("TTSListMenuSingle")
+            self.handle_display_manager("TTSListMenuSingle", tts_engines=menu["options"])
         else:
-            self.handle_display_manager("TTSListMenuNested")
+            self.handle_display_manager("TTSListMenuNested", tts_engines=menu["plugins"])
 
-        self.send_stop_signal("pairing.stt.menu.stop")
         self.speak_dialog("tts.intro", wait=True)
         self.speak_dialog("options.select.gui", wait=True)
 
@@ -751,19 +1540,101 @@ class PairingSkill(OVOSSkill):
 
     def end_setup(self, success=False):
         if self.state != SetupState.INACTIVE:
-            self.handle_display_manager("LoadingSkills")
-            if success:  # dont restart setup on next boot
-                self.settings["first_setup"] = False
+            # still loading if setup was already complete, nothing to report
+            setup_ran = self.state != SetupState.LOADING
+            if self.state != SetupState.PROVISIONING:
+                self.handle_display_manager("LoadingSkills")
+            if success:
+                # selected engines load while the LoadingSkills page is shown
+                self.warmup_engines()
+                # dont restart setup on next boot
+                if self.settings.get("first_setup", True):
+                    self.settings["first_setup"] = False
+                    self.store_settings()
+                self._write_setup_marker()
+            self.flush_settings()
             self.state = SetupState.FINISHED
             self.bus.emit(Message("ovos.setup.finished"))  # tell skill manager to stop waiting for pairing step
+            if setup_ran:
+                self.report_timeline(success)
+
+    def warmup_engines(self):
+        """ get the model files of the engines this setup run configured
+        into the page cache so the services load them from memory"""
+        if self.setup is None or not self.setup.configured_engines:
+            return
+        engines, self.setup.configured_engines = self.setup.configured_engines, {}
+        if not self.settings.get("warmup_engines", True):
+            return
+        from .warmup import EngineWarmup
+        if self.warmup is None:
+            self.warmup = EngineWarmup(self.bus)
+        self.warmup.start(engines)
+
+    def _write_setup_marker(self):
+        marker = self._setup_marker()
+        try:
+            with open(self.setup_marker_path, encoding="utf-8") as f:
+                if json.load(f) == marker:
+                    return
+        except (OSError, ValueError):
+            pass
+        try:
+            write_json_atomic(self.setup_marker_path, marker)
+        except Exception as e:
+            LOG.error(f"Failed to save setup marker: {e}")
+
+    def report_timeline(self, success=False):
+        """ broadcast how long each setup step took and append it to a local log """
+        timeline = self.timeline.to_dict()
+        timeline["success"] = success
+        timeline["messages"] = self.bus.stats()
+        self.timeline.reset()
+        self.bus.reset_stats()
+        self.bus.emit(Message("ovos.setup.timeline", timeline))
+        try:
+            append_jsonl(join(self.file_system.path, "setup_timeline.jsonl"), timeline,
+                         max_lines=self.timeline_history)
+        except Exception as e:
+            LOG.error(f"Failed to save setup timeline: {e}")
 
     # GUI
-    def handle_display_manager(self, state):
-        self.gui["state"] = state
-        self.gui.show_page(
-            "ProcessLoader",
-            override_idle=True,
-            override_animations=True)
+    @contextmanager
+    def gui_batch(self):
+        """ collect self.gui[...] changes and sync them in a single
+        gui.value.set message when the outermost batch exits
+
+        showing a page inside the batch already sends all session data,
+        handle_display_manager marks the batch as clean in that case"""
+        with self._gui_batch_lock:
+            if self._gui_batch_depth == 0:
+                self.gui._sync_data = self._defer_gui_sync
+            self._gui_batch_depth += 1
+            try:
+                yield self.gui
+            finally:
+                self._gui_batch_depth -= 1
+                if self._gui_batch_depth == 0:
+                    del self.gui._sync_data
+                    if self._gui_dirty:
+                        self._gui_dirty = False
+                        self.gui._sync_data()
+
+    def _defer_gui_sync(self):
+        self._gui_dirty = True
+
+    def handle_display_manager(self, state, **data):
+        """ show the ProcessLoader page in state, extra kwargs are
+        session data sent in the same message as the page change"""
+        with self.gui_batch():
+            for k, v in data.items():
+                self.gui[k] = v
+            self.gui["state"] = state
+            self.gui.show_page(
+                "ProcessLoader",
+                override_idle=True,
+                override_animations=True)
+            self._gui_dirty = False  # show_page synced all session data
 
     def show_pairing_start(self):
         self.handle_display_manager("PairingStart")
@@ -772,31 +1643,36 @@ class PairingSkill(OVOSSkill):
 
     def show_pairing(self, code):
         # self.gui.remove_page("pairing_start.qml")
-        self.gui["backendurl"] = self.settings.get("pairing_url") or "home.mycroft.ai"
-        self.gui["code"] = code
-        self.handle_display_manager("Pairing")
+        self.handle_display_manager("Pairing",
+                                    backendurl=self.settings.get("pairing_url") or "home.mycroft.ai",
+                                    code=code)
         # self.gui.show_page("pairing.qml", override_idle=True,
         # override_animations=True)
 
     def show_pairing_success(self):
         # self.gui.remove_page("pairing.qml")
-        self.gui["status"] = "Success"
-        self.gui["label"] = "Device Paired"
-        self.gui["bgColor"] = "#40DBB0"
         # self.gui.show_page("status.qml", override_idle=True,
         # override_animations=True)
-        self.handle_display_manager("Status")
+        self.handle_display_manager("Status", status="Success",
+                                    label="Device Paired", bgColor="#40DBB0")
 
     def show_pairing_fail(self):
         self.gui.release()
-        self.gui["status"] = "Failed"
-        self.gui["label"] = "Pairing Failed"
-        self.gui["bgColor"] = "#FF0000"
-        self.handle_display_manager("Status")
-        sleep(5)
+        self.handle_display_manager("Status", status="Failed",
+                                    label="Pairing Failed", bgColor="#FF0000")
 
     def shutdown(self):
-        self.pairing.shutdown()
+        self.cancel_continuations()
+        self.flush_settings()
+        self.probes.shutdown()
+        if self.model_prefetch:
+            self.model_prefetch.cancel()
+        if self.activation:
+            self.activation.stop()
+        if self.pairing:
+            self.pairing.shutdown()
+        if self.backend_sessions:
+            self.backend_sessions.close()
 
 
 def create_skill():
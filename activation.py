@@ -0,0 +1,88 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import random
+from threading import Event, Lock, Thread
+
+from ovos_utils.log import LOG
+
+
+class ActivationScheduler:
+    """ polls the backend until a pairing code is activated
+
+    the first poll runs right after start(), then the wait starts at initial
+    seconds and is multiplied by factor after every poll up to max_interval,
+    each wait is randomized by +-jitter (a fraction of it) so devices that
+    got their codes at the same time do not poll in lockstep
+
+    wake() polls now and restarts the backoff, for a backend push or the
+    user confirming on screen that the code was entered
+
+    poll() returns True when no more polls are needed"""
+
+    def __init__(self, poll, initial=1.0, factor=2.0, max_interval=30.0, jitter=0.25, seed=None):
+        self.poll = poll
+        self.initial = initial
+        self.factor = factor
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.polls = 0
+        self._random = random.Random(seed)
+        self._lock = Lock()
+        self._stop = Event()
+        self._wake = Event()
+        self._stop.set()
+
+    @property
+    def is_running(self) -> bool:
+        return not self._stop.is_set()
+
+    def interval(self, attempt: int) -> float:
+        """ seconds to wait after attempt polls since start or the last wake """
+        wait = min(self.initial * self.factor ** max(attempt - 1, 0), self.max_interval)
+        if self.jitter:
+            wait *= self._random.uniform(1 - self.jitter, 1 + self.jitter)
+        return wait
+
+    def start(self):
+        """ poll now and keep polling, a running schedule is replaced """
+        with self._lock:
+            self._stop.set()
+            # every schedule gets its own events, a replaced one can not be woken
+            self._stop, self._wake = Event(), Event()
+            self._wake.set()
+            Thread(target=self._run, args=(self._stop, self._wake),
+                   name="setup-activation", daemon=True).start()
+
+    def wake(self):
+        with self._lock:
+            self._wake.set()
+
+    def stop(self):
+        with self._lock:
+            self._stop.set()
+
+    def _run(self, stop, wake):
+        attempt = 0
+        while not stop.is_set():
+            if wake.wait(self.interval(attempt)):
+                wake.clear()
+                attempt = 0
+            if stop.is_set():
+                return
+            self.polls += 1
+            attempt += 1
+            try:
+                if self.poll():
+                    stop.set()
+            except Exception as e:
+                LOG.error(f"activation poll failed: {e}")
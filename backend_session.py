@@ -0,0 +1,80 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from functools import partial
+from threading import Lock
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_METHODS = ("get", "post", "put", "patch")
+
+
+class BackendSessions:
+    """ one keep-alive requests.Session per backend host
+
+    DeviceApi backends open a new connection for every request, bind()
+    sends the requests of an api object through the pooled session of its
+    host instead, a new DeviceApi for the same host (set_api_url creates
+    one every time) reuses the open connections"""
+
+    def __init__(self, connect_timeout=3.05, read_timeout=15, pool_size=4):
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self._lock = Lock()
+        self._sessions = {}  # scheme://host:port -> Session
+
+    @staticmethod
+    def _key(url: str) -> str:
+        if not url.startswith("http"):
+            url = f"http://{url}"
+        url = urlparse(url)
+        return f"{url.scheme}://{url.netloc}"
+
+    def session(self, url: str) -> requests.Session:
+        key = self._key(url)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[key] = session
+            return session
+
+    def bind(self, api):
+        """ route the requests of a DeviceApi (or any BaseApi) through the
+        session of its backend url, returns api """
+        backend = api.backend
+        for method in _METHODS:
+            setattr(backend, method, partial(self._request, backend, method))
+        return api
+
+    def _request(self, backend, method, url=None, *args, **kwargs):
+        # same as AbstractBackend.get/post/put/patch, over the pooled session
+        url = url or backend.url
+        if not url.startswith("http"):
+            url = f"http://{url}"
+        headers = backend.headers
+        if "headers" in kwargs:
+            headers.update(kwargs.pop("headers"))
+        backend.check_token()
+        kwargs.setdefault("timeout", self.timeout)
+        return getattr(self.session(url), method)(url, *args, headers=headers, **kwargs)
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            session.close()
@@ -0,0 +1,147 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""validate provisioning profiles at scale before flashing images
+
+every profile in a directory is applied by PairingSkill on a FakeBus with
+its own temporary XDG and config directories, in a process pool, the
+backend accepts any device and nothing leaves the machine
+
+    python -m skill_ovos_setup.bulk_provisioning profiles/ --workers 8 --output report.json
+
+per profile the report has the merged mycroft.conf, the setup states it
+went through and timings, the exit code is 1 if any profile failed
+"""
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from os.path import basename, join
+from time import monotonic
+from types import SimpleNamespace
+
+from .provisioning import PROFILE_FILE
+
+SKILL_ID = "skill-ovos-setup.openvoiceos"
+
+
+class SimulatedDeviceApi:
+    """ a backend that activates every device right away """
+
+    def __init__(self, url=None, version="v1", identity_file=None, backend_type=None):
+        self.url = url
+        self.backend_type = backend_type
+        self.backend = SimpleNamespace(url=url)  # nothing is sent, pooling it is a no-op
+
+    def get_code(self, state):
+        return {"code": "ABCDEF", "token": state, "expiration": 72000, "state": state}
+
+    def activate(self, state, token, *args, **kwargs):
+        return {"uuid": state, "accessToken": token, "refreshToken": token, "expiration": 72000}
+
+    def update_version(self, *args, **kwargs):
+        pass
+
+
+def _merged_config(path: str) -> dict:
+    from ovos_config.locations import DEFAULT_CONFIG
+    from ovos_config.models import LocalConf
+    from ovos_utils.json_helper import merge_dict
+    config = dict(LocalConf(DEFAULT_CONFIG))
+    return merge_dict(config, dict(LocalConf(path)))
+
+
+def simulate_profile(path: str) -> dict:
+    """ apply one profile in this process, see module docstring """
+    from unittest.mock import patch
+    from ovos_config.models import LocalConf
+    from ovos_utils.messagebus import FakeBus
+    from . import PairingSkill, SetupState
+
+    start = monotonic()
+    result = {"profile": basename(path), "ok": False, "error": "", "wizard": False,
+              "states": [SetupState.LOADING.value], "config": {}, "timeline": {}}
+    bus = FakeBus()
+    bus.on("ovos.setup.state", lambda m: result["states"].append(SetupState(m.data["state"]).value))
+    bus.on("ovos.setup.provisioning.failed", lambda m: result.update(error=m.data["error"]))
+    bus.on("ovos.setup.timeline", lambda m: result.update(timeline=m.data["totals"]))
+
+    def _wizard(skill):
+        result["wizard"] = True  # the wizard would run, not simulated
+
+    with tempfile.TemporaryDirectory() as tmp, ExitStack() as stack:
+        settings_dir = join(tmp, "config", "mycroft", "skills", SKILL_ID)
+        os.makedirs(settings_dir)
+        shutil.copy(path, join(settings_dir, PROFILE_FILE))
+        conf = join(tmp, "mycroft.conf")
+        for p in (patch.dict(os.environ, {"XDG_CONFIG_HOME": join(tmp, "config"),
+                                          "XDG_DATA_HOME": join(tmp, "data"),
+                                          "XDG_CACHE_HOME": join(tmp, "cache")}),
+                  patch(f"{__package__}.MycroftUserConfig", side_effect=lambda: LocalConf(conf)),
+                  patch("ovos_backend_client.api.DeviceApi", SimulatedDeviceApi),
+                  patch("ovos_backend_client.identity.IdentityManager.save"),
+                  patch.object(PairingSkill, "start_probes", lambda skill: None),
+                  patch.object(PairingSkill, "load_wizard", lambda skill: None),
+                  patch.object(PairingSkill, "_init_state", _wizard),
+                  patch.object(PairingSkill, "warmup_engines", lambda skill: None)):
+            stack.enter_context(p)
+        skill = PairingSkill()
+        try:
+            skill._startup(bus, SKILL_ID)
+        except Exception as e:
+            result["error"] = result["error"] or repr(e)
+        finally:
+            skill.shutdown()
+        result["ok"] = result["states"][-1] == SetupState.FINISHED.value and not result["wizard"]
+        if not result["ok"] and not result["error"]:
+            result["error"] = "setup did not finish"
+        result["config"] = _merged_config(conf)
+    result["seconds"] = round(monotonic() - start, 3)
+    return result
+
+
+def provision_all(profile_dir: str, workers: int = None) -> list:
+    """ simulate every *.json profile in profile_dir, results in name order """
+    paths = sorted(join(profile_dir, f) for f in os.listdir(profile_dir) if f.endswith(".json"))
+    # forked workers would inherit the identity file lock of this process
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(simulate_profile, paths))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="simulate setup for a directory of provisioning profiles")
+    parser.add_argument("profiles", help="directory with one json profile per device variant")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: cpu count)")
+    parser.add_argument("--output", default=None, help="write the full report here as json")
+    args = parser.parse_args()
+
+    start = monotonic()
+    results = provision_all(args.profiles, args.workers)
+    for r in results:
+        status = "ok" if r["ok"] else f"FAILED {r['error']}".strip()
+        print(f"{r['profile']:<32} {r['seconds']:7.3f}s  {' -> '.join(r['states']):<36} {status}")
+    failed = sum(not r["ok"] for r in results)
+    print(f"{len(results)} profiles, {failed} failed, {monotonic() - start:.1f}s")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""in-process stand-in for a personal backend, for offline pairing tests
+
+serves the pairing endpoints DeviceApi uses with a personal backend on
+127.0.0.1, every request can be delayed and failures injected
+
+    with MockPersonalBackend(latency=0.2, activate_after=2) as backend:
+        pairing.set_api_url(backend.url, backend_type=BackendType.PERSONAL)
+        ...
+        backend.counts()  # {"code": 1, "activate": 3, "version": 1}
+"""
+import json
+import random
+import re
+import string
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from time import monotonic, sleep
+from urllib.parse import parse_qs, urlparse
+from uuid import uuid4
+
+# (method, path) -> endpoint name used for failure injection and counters
+_ROUTES = [
+    ("GET", re.compile(r"^/v1/device/code$"), "code"),
+    ("POST", re.compile(r"^/v1/device/activate$"), "activate"),
+    ("GET", re.compile(r"^/v1/auth/token$"), "token"),
+    ("GET", re.compile(r"^/v1/device/(?P<uuid>[^/]+)$"), "device"),
+    ("PATCH", re.compile(r"^/v1/device/(?P<uuid>[^/]+)$"), "version"),
+]
+
+
+class MockPersonalBackend:
+    """ pairing and activation endpoints of a personal backend
+
+    latency (+ a random jitter) delays every response, handshake every new
+    connection (a tcp/tls handshake on a slow link), failure_rate answers
+    a fraction of the requests with a 503 and fail() makes the next requests
+    to one endpoint fail, activate_after rejects that many activation polls
+    per pairing code as if the user had not entered it yet, confirm() skips
+    the rest of the wait"""
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, activate_after=0,
+                 seed=None, host="127.0.0.1", port=0, handshake=0.0):
+        self.latency = latency
+        self.handshake = handshake
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.activate_after = activate_after
+        self.host = host
+        self.port = port
+        self.requests = []  # {"endpoint", "method", "path", "status", "time"}
+        self.connections = 0  # tcp connections accepted, fewer than requests with keep-alive
+        self.devices = {}  # uuid -> identity
+        self._random = random.Random(seed)
+        self._failures = {}  # endpoint -> [remaining, status]
+        self._pending = {}  # token -> {"state", "code", "polls", "confirmed"}
+        self._lock = Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # headers and body are written separately, on a kept alive
+            # connection nagle would hold the body back for a delayed ack
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with backend._lock:
+                    backend.connections += 1
+                if backend.handshake:
+                    sleep(backend.handshake)
+
+            def _handle(self):
+                status, body = backend._dispatch(self.command, self.path, self._body())
+                payload = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "text/plain" if isinstance(body, str)
+                                 else "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if not length:
+                    return {}
+                try:
+                    return json.loads(self.rfile.read(length))
+                except ValueError:
+                    return {}
+
+            do_GET = do_POST = do_PATCH = do_PUT = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    # test controls
+    def fail(self, endpoint: str, times: int = 1, status: int = 500):
+        """ answer the next requests to endpoint with an error status """
+        with self._lock:
+            self._failures[endpoint] = [times, status]
+
+    def confirm(self, code: str = None):
+        """ the user entered code (or every pending code) on the backend """
+        with self._lock:
+            for pending in self._pending.values():
+                if code is None or pending["code"] == code:
+                    pending["confirmed"] = True
+
+    def counts(self) -> dict:
+        with self._lock:
+            return dict(Counter(r["endpoint"] for r in self.requests))
+
+    # request handling
+    def _dispatch(self, method, path, data):
+        url = urlparse(path)
+        for route_method, pattern, endpoint in _ROUTES:
+            match = pattern.match(url.path)
+            if match and route_method == method:
+                break
+        else:
+            return self._record(None, method, path, 404, "not found")
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            sleep(delay)
+        with self._lock:
+            failure = self._failures.get(endpoint)
+            if failure and failure[0] > 0:
+                failure[0] -= 1
+                injected = failure[1]
+            elif self.failure_rate and self._random.random() < self.failure_rate:
+                injected = 503
+            else:
+                injected = None
+        if injected:
+            return self._record(endpoint, method, path, injected, "injected failure")
+        handler = getattr(self, f"_{endpoint}")
+        status, body = handler(data=data, query=parse_qs(url.query), **match.groupdict())
+        return self._record(endpoint, method, path, status, body)
+
+    def _record(self, endpoint, method, path, status, body):
+        with self._lock:
+            self.requests.append({"endpoint": endpoint, "method": method, "path": path,
+                                  "status": status, "time": monotonic()})
+        return status, body
+
+    def _code(self, data, query):
+        state = (query.get("state") or [str(uuid4())])[0]
+        code = "".join(self._random.choice(string.ascii_uppercase) for _ in range(6))
+        token = uuid4().hex
+        with self._lock:
+            self._pending[token] = {"state": state, "code": code, "polls": 0, "confirmed": False}
+        return 200, {"code": code, "uuid": state, "token": token, "expiration": 72000, "state": state}
+
+    def _activate(self, data, query):
+        with self._lock:
+            pending = self._pending.get(data.get("token"))
+            if pending is None:
+                return 401, "unknown pairing token"
+            pending["polls"] += 1
+            if not pending["confirmed"] and pending["polls"] <= self.activate_after:
+                # not json, DeviceApi raises the HTTPError PairingManager polls on
+                return 401, "pairing code not entered yet"
+            identity = {"uuid": pending["state"], "accessToken": uuid4().hex,
+                        "refreshToken": uuid4().hex, "expiration": 72000}
+            self.devices[pending["state"]] = identity
+        return 200, identity
+
+    def _token(self, data, query):
+        return 200, {"accessToken": uuid4().hex, "refreshToken": uuid4().hex, "expiration": 72000}
+
+    def _device(self, data, query, uuid):
+        with self._lock:
+            if uuid not in self.devices:
+                return 401, "device not paired"
+        return 200, {"uuid": uuid, "name": "mock device"}
+
+    def _version(self, data, query, uuid):
+        return 200, {}
@@ -0,0 +1,265 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""download and unpack the vosk model for the setup language ahead of time
+
+downloads resume from the partial file left by an interrupted attempt and
+are verified against the published checksum before being unpacked, the url
+of a model can also be a local path or file:// url for offline images
+"""
+import hashlib
+import json
+import os
+import shutil
+import zipfile
+from os.path import basename, isdir, isfile, join
+from tempfile import mkdtemp
+from threading import Event, Lock, Thread
+from urllib.parse import urlparse
+
+from ovos_config.locations import get_xdg_data_save_path
+from ovos_utils.log import LOG
+
+VOSK_MODEL_LIST = "https://alphacephei.com/vosk/models/model-list.json"
+
+
+class PrefetchCancelled(Exception):
+    """ a newer prefetch replaced this one """
+
+
+def get_vosk_model_dir() -> str:
+    return join(get_xdg_data_save_path(), "vosk")
+
+
+def _local_path(url: str):
+    """ filesystem path for local sources, None for remote urls """
+    parsed = urlparse(url)
+    if parsed.scheme == "file":
+        return parsed.path
+    if parsed.scheme in ("http", "https"):
+        return None
+    return url
+
+
+def find_vosk_model(lang: str, models: list) -> dict:
+    """ smallest current model for lang from the vosk model list,
+    an exact dialect match wins over any model of the same language"""
+    lang = lang.lower().replace("_", "-")
+    candidates = [m for m in models
+                  if m.get("type") == "small" and str(m.get("obsolete")).lower() != "true"]
+    for match in (lambda l: l == lang, lambda l: l.split("-")[0] == lang.split("-")[0]):
+        found = [m for m in candidates if match(m.get("lang", "").lower())]
+        if found:
+            return min(found, key=lambda m: int(m.get("size") or 0))
+    return None
+
+
+def load_vosk_model_list(url: str = VOSK_MODEL_LIST, timeout: float = 10) -> list:
+    path = _local_path(url)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    import requests
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def verify_checksum(path: str, md5: str = None, sha256: str = None):
+    """ raise ValueError if the file does not match the expected digest """
+    if not md5 and not sha256:
+        return
+    algo, expected = ("sha256", sha256) if sha256 else ("md5", md5)
+    digest = hashlib.new(algo)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    if digest.hexdigest().lower() != expected.lower():
+        raise ValueError(f"{basename(path)} {algo} mismatch, "
+                         f"expected {expected} got {digest.hexdigest()}")
+
+
+class ModelDownload:
+    """ resumable download of url to path, progress(done_bytes, total_bytes)
+    is called after every chunk, total is None if the size is unknown"""
+
+    def __init__(self, url, path, progress=None, chunk_size=1 << 16, timeout=30):
+        self.url = url
+        self.path = path
+        self.part = path + ".part"
+        self.progress = progress
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+
+    def _chunks_local(self, src, offset):
+        total = os.path.getsize(src)
+        if offset > total:  # not a partial copy of this file
+            offset = 0
+
+        def _read():
+            with open(src, "rb") as f:
+                f.seek(offset)
+                yield from iter(lambda: f.read(self.chunk_size), b"")
+
+        return _read(), offset, total
+
+    def _chunks_remote(self, offset):
+        import requests
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        response = requests.get(self.url, headers=headers, stream=True, timeout=self.timeout)
+        if response.status_code == 416:  # nothing left to download
+            response.close()
+            return iter(()), offset, offset
+        response.raise_for_status()
+        if response.status_code != 206:  # server ignored the range, start over
+            offset = 0
+        length = response.headers.get("Content-Length")
+        total = offset + int(length) if length else None
+        return response.iter_content(self.chunk_size), offset, total
+
+    def run(self, cancelled: Event = None) -> str:
+        offset = os.path.getsize(self.part) if isfile(self.part) else 0
+        src = _local_path(self.url)
+        if src:
+            chunks, offset, total = self._chunks_local(src, offset)
+        else:
+            chunks, offset, total = self._chunks_remote(offset)
+        if offset:
+            LOG.info(f"resuming {basename(self.path)} at {offset} bytes")
+        done = offset
+        with open(self.part, "ab" if offset else "wb") as f:
+            for chunk in chunks:
+                if cancelled is not None and cancelled.is_set():
+                    raise PrefetchCancelled(self.url)
+                f.write(chunk)
+                done += len(chunk)
+                if self.progress:
+                    self.progress(done, total)
+        os.replace(self.part, self.path)
+        return self.path
+
+
+def unpack_model(archive: str, dest: str):
+    """ extract a model zip with a single top level folder into dest """
+    parent = os.path.dirname(dest)
+    tmp = mkdtemp(dir=parent, prefix=".tmp_")
+    try:
+        with zipfile.ZipFile(archive) as z:
+            z.extractall(tmp)
+        entries = os.listdir(tmp)
+        root = join(tmp, entries[0]) if len(entries) == 1 and isdir(join(tmp, entries[0])) else tmp
+        if isdir(dest):
+            shutil.rmtree(dest)
+        os.replace(root, dest)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+class VoskModelPrefetch:
+    """ fetch the vosk model for a language in a background thread
+
+    callback(lang, state, progress) reports the states "downloading",
+    "verifying", "unpacking", "ready" (progress is then the model path)
+    and "failed", progress is a 0-1 fraction or None if unknown
+
+    models maps a language to {"url", "md5"/"sha256", "name"} and takes
+    precedence over the public model list, use it for local sources"""
+
+    def __init__(self, model_dir=None, models=None, model_list=VOSK_MODEL_LIST, callback=None):
+        self.model_dir = model_dir or get_vosk_model_dir()
+        self.models = models or {}
+        self.model_list = model_list
+        self.callback = callback
+        self._lock = Lock()
+        self._cancel = None
+        self.thread = None
+        self.lang = None
+
+    def _report(self, lang, state, progress=None):
+        if self.callback:
+            try:
+                self.callback(lang, state, progress)
+            except Exception as e:
+                LOG.error(f"model prefetch callback failed: {e}")
+
+    def get_model_info(self, lang: str) -> dict:
+        lang = lang.lower().replace("_", "-")
+        for key in (lang, lang.split("-")[0]):
+            if key in self.models:
+                info = dict(self.models[key])
+                info.setdefault("name", basename(info["url"]).rsplit(".zip", 1)[0])
+                return info
+        return find_vosk_model(lang, load_vosk_model_list(self.model_list))
+
+    def model_path(self, info: dict) -> str:
+        return join(self.model_dir, info["name"])
+
+    def fetch(self, lang: str, cancelled: Event = None) -> str:
+        """ blocking, path of the unpacked model for lang """
+        info = self.get_model_info(lang)
+        if not info:
+            raise FileNotFoundError(f"no vosk model available for {lang}")
+        path = self.model_path(info)
+        if isdir(path):
+            return path
+        os.makedirs(self.model_dir, exist_ok=True)
+        archive = path + ".zip"
+        download = ModelDownload(info["url"], archive,
+                                 lambda done, total: self._report(lang, "downloading",
+                                                                  done / total if total else None))
+        self._report(lang, "downloading", 0.0)
+        download.run(cancelled)
+        self._report(lang, "verifying")
+        try:
+            verify_checksum(archive, info.get("md5"), info.get("sha256"))
+        except ValueError:
+            os.remove(archive)  # corrupt, do not resume from it
+            raise
+        self._report(lang, "unpacking")
+        unpack_model(archive, path)
+        os.remove(archive)
+        return path
+
+    def _run(self, lang, cancelled, previous=None):
+        if previous is not None:
+            previous.join()  # never write the same partial file from two threads
+        try:
+            path = self.fetch(lang, cancelled)
+        except PrefetchCancelled:
+            LOG.debug(f"vosk model prefetch for {lang} cancelled")
+            return
+        except Exception as e:
+            LOG.error(f"vosk model prefetch for {lang} failed: {e}")
+            self._report(lang, "failed")
+            return
+        LOG.info(f"vosk model for {lang} ready: {path}")
+        self._report(lang, "ready", path)
+
+    def start(self, lang: str) -> Thread:
+        """ prefetch in the background, a running prefetch for another
+        language is cancelled, its partial download is kept for later"""
+        with self._lock:
+            if self.lang == lang and self.thread is not None and self.thread.is_alive():
+                return self.thread
+            if self._cancel is not None:
+                self._cancel.set()
+            self.lang = lang
+            self._cancel = Event()
+            self.thread = Thread(target=self._run, args=(lang, self._cancel, self.thread),
+                                 daemon=True)
+            self.thread.start()
+            return self.thread
+
+    def cancel(self):
+        with self._lock:
+            if self._cancel is not None:
+                self._cancel.set()
@@ -0,0 +1,137 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from collections import Counter
+from functools import wraps
+from threading import Lock
+from time import monotonic
+
+from ovos_workshop.decorators import killable_event
+
+SPEECH_STOP = "mycroft.audio.speech.stop"
+RECORD_STOP = "recognizer_loop:record_stop"
+# messages that start what a stop signal would stop, a stop sent after
+# one of these is never coalesced with the stop sent before it
+_RESTARTS = {SPEECH_STOP: ("speak", "mycroft.audio.queue"),
+             RECORD_STOP: ("mycroft.mic.listen",)}
+# stop messages of every handler decorated with killable_menu
+KILLABLE_MENUS = set()
+
+
+class OutboundBus:
+    """ the skill side of the messagebus, counts emitted messages by type
+
+    emit_stop() drops stop signals for killable menus that are not running
+    and coalesces a stop signal with an identical one sent less than
+    coalesce_window seconds ago, unless what it stops was started since
+
+    everything else is delegated to the wrapped bus client"""
+
+    def __init__(self, bus, coalesce_window=0.5):
+        self.client = bus
+        self.coalesce_window = coalesce_window
+        self.sent = Counter()
+        self.dropped = Counter()
+        self._lock = Lock()
+        self._running = Counter()  # killable menu stop message -> running handlers
+        self._last_stop = {}  # stop message type -> monotonic timestamp
+        self._restarted_by = {m: stop for stop, msgs in _RESTARTS.items() for m in msgs}
+
+    def __getattr__(self, item):
+        return getattr(self.client, item)
+
+    # same bus connection as the wrapped client
+    def __eq__(self, other):
+        if isinstance(other, OutboundBus):
+            other = other.client
+        return self.client is other
+
+    def __hash__(self):
+        return hash(self.client)
+
+    def emit(self, message):
+        with self._lock:
+            self.sent[message.msg_type] += 1
+            stop = self._restarted_by.get(message.msg_type)
+            if stop:
+                self._last_stop.pop(stop, None)
+        return self.client.emit(message)
+
+    # killable menus
+    def started(self, stop_msg):
+        with self._lock:
+            self._running[stop_msg] += 1
+            self._last_stop.pop(stop_msg, None)
+
+    def finished(self, stop_msg):
+        with self._lock:
+            self._running[stop_msg] = max(0, self._running[stop_msg] - 1)
+
+    def is_running(self, stop_msg) -> bool:
+        with self._lock:
+            return self._running[stop_msg] > 0
+
+    def emit_stop(self, message) -> bool:
+        """ emit a stop signal unless it is redundant, returns True if sent """
+        msg_type = message.msg_type
+        now = monotonic()
+        with self._lock:
+            if msg_type in KILLABLE_MENUS and not self._running[msg_type]:
+                self.dropped[msg_type] += 1
+                return False
+            last = self._last_stop.get(msg_type)
+            if last is not None and now - last < self.coalesce_window:
+                self.dropped[msg_type] += 1
+                return False
+            self._last_stop[msg_type] = now
+        self.emit(message)
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"sent": dict(self.sent),
+                    "dropped": dict(self.dropped),
+                    "total_sent": sum(self.sent.values()),
+                    "total_dropped": sum(self.dropped.values())}
+
+    def reset_stats(self):
+        with self._lock:
+            self.sent.clear()
+            self.dropped.clear()
+
+
+def killable_menu(msg, callback=None):
+    """ killable_event that also tells the OutboundBus whether the handler
+    is running, stop signals for menus that are not running are not sent"""
+
+    KILLABLE_MENUS.add(msg)
+
+    def create_killable(func):
+        @wraps(func)
+        def run(self, *args, **kwargs):
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                self.bus.finished(msg)
+
+        killable = killable_event(msg=msg, callback=callback)(run)
+
+        @wraps(func)
+        def call(self, *args, **kwargs):
+            # marked before the handler thread starts, a stop sent right
+            # after calling the handler is never dropped
+            self.bus.started(msg)
+            return killable(self, *args, **kwargs)
+
+        return call
+
+    return create_killable
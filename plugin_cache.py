@@ -0,0 +1,281 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import hashlib
+import json
+import sys
+from copy import deepcopy
+from os import listdir
+from os.path import isdir, isfile
+from threading import Lock, RLock, Thread
+from time import monotonic
+
+from ovos_plugin_manager.utils.ui import PluginUIHelper, PluginTypes, hash_dict
+from ovos_utils.log import LOG
+
+from .utils import write_json_atomic
+
+
+def get_installed_fingerprint() -> str:
+    """ hash of all installed distributions (name and version)
+
+    dist-info/egg-info folder names already encode name and version,
+    listing them is much cheaper than parsing every package metadata"""
+    dists = set()
+    for folder in sys.path:
+        if not folder or not isdir(folder):
+            continue
+        try:
+            dists.update(d for d in listdir(folder)
+                         if d.endswith((".dist-info", ".egg-info", ".egg-link")))
+        except OSError:
+            continue
+    return hashlib.sha1("\n".join(sorted(dists)).encode("utf-8")).hexdigest()
+
+
+def group_plugin_options(opts: list, plugin_type) -> list:
+    """ per plugin view of config options, same format as
+    PluginUIHelper.get_plugin_options but without scanning plugins again"""
+    plugs = {}
+    for entry in opts:
+        engine = entry["engine"]
+        if engine not in plugs:
+            plugs[engine] = {"engine": engine,
+                             "plugin_name": entry["plugin_name"],
+                             "supports_offline_mode": False,
+                             "supports_online_mode": False,
+                             "options": []}
+            if plugin_type == PluginTypes.TTS:
+                plugs[engine]["supports_male_voice"] = False
+                plugs[engine]["supports_female_voice"] = False
+
+        if "offline" in entry:
+            if entry["offline"]:
+                plugs[engine]["supports_offline_mode"] = True
+            else:
+                plugs[engine]["supports_online_mode"] = True
+
+        if entry.get("gender", "?") == "male":
+            plugs[engine]["supports_male_voice"] = True
+        elif entry.get("gender", "?") == "female":
+            plugs[engine]["supports_female_voice"] = True
+
+        plugs[engine]["options"].append(entry)
+    return list(plugs.values())
+
+
+class PluginOptionsCache:
+    """ thread safe cache of plugin options for the STT/TTS setup menus
+
+    plugin discovery is slow on low end devices, options are computed once
+    per (lang, plugin type, blacklist, preferred engine) and reused until
+    the set of installed distributions changes
+
+    if catalog_path is set, options and their plugin configs are also
+    persisted to disk and reused across boots while the fingerprint matches
+
+    discovery calls are recorded in timeline (a SetupTimeline) if set
+
+    if health (a PluginHealth) is set, options of plugins that are broken
+    or not installed are dropped before they are cached"""
+
+    def __init__(self, catalog_path=None, timeline=None, health=None):
+        self.catalog_path = catalog_path
+        self.timeline = timeline
+        self.health = health
+        self._lock = RLock()
+        self._key_locks = {}
+        self._options = {}
+        self._configs = {}  # hash_dict(option) -> (option, plugin config)
+        self._fingerprint = None
+        self._prefetch_thread = None
+
+    @staticmethod
+    def _make_key(lang, plugin_type, blacklist=None, preferred=None, max_opts=50):
+        return (lang, PluginTypes(plugin_type).value,
+                tuple(sorted(blacklist or [])), preferred or "", max_opts)
+
+    def _validate(self):
+        """ drop everything if installed distributions changed """
+        fingerprint = get_installed_fingerprint()
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                if self._fingerprint is not None:
+                    LOG.info("installed plugins changed, invalidating plugin options cache")
+                self._options = {}
+                self._configs = {}
+                self._fingerprint = fingerprint
+                self._load_catalog()
+
+    def _load_catalog(self):
+        if not self.catalog_path or not isfile(self.catalog_path):
+            return
+        try:
+            with open(self.catalog_path, encoding="utf-8") as f:
+                catalog = json.load(f)
+        except Exception as e:
+            LOG.warning(f"Failed to read plugin catalog: {e}")
+            return
+        if catalog.get("fingerprint") != self._fingerprint:
+            LOG.info("plugin catalog is outdated, plugins will be rediscovered")
+            return
+        for key, opts in catalog.get("options", []):
+            # json turns the blacklist tuple into a list
+            self._options[tuple(tuple(k) if isinstance(k, list) else k
+                                for k in key)] = opts
+        for opt, cfg in catalog.get("configs", []):
+            self._configs[hash_dict(opt)] = (opt, cfg)
+        LOG.debug(f"loaded plugin catalog: {self.catalog_path}")
+
+    def _save_catalog(self):
+        if not self.catalog_path:
+            return
+        with self._lock:
+            catalog = {"fingerprint": self._fingerprint,
+                       "options": [[list(k), v] for k, v in self._options.items()],
+                       "configs": [[o, c] for o, c in self._configs.values()]}
+        try:
+            write_json_atomic(self.catalog_path, catalog, separators=(",", ":"))
+        except Exception as e:
+            LOG.warning(f"Failed to save plugin catalog: {e}")
+
+    def _store_configs(self, opts, plugin_type):
+        """ keep the plugin config of every option, PluginUIHelper only
+        knows about options it discovered during this process lifetime"""
+        for opt in opts:
+            for o in opt.get("options", [opt]):
+                cfg = PluginUIHelper.option2config(o, plugin_type)
+                if cfg:
+                    self._configs[hash_dict(o)] = (o, cfg)
+
+    def _get(self, key, lang, plugin_type, compute, configs=None):
+        """ cached value of compute(), configs extracts the list of
+        options from the computed value if it is not a list itself"""
+        with self._lock:
+            if key in self._options:
+                return deepcopy(self._options[key])
+            key_lock = self._key_locks.setdefault(key, Lock())
+        # if the prefetch thread is computing this key, wait for it instead of scanning twice
+        with key_lock:
+            with self._lock:
+                if key in self._options:
+                    return deepcopy(self._options[key])
+            start = monotonic()
+            opts = compute()
+            if self.timeline:
+                self.timeline.record("plugins", PluginTypes(plugin_type).value, start,
+                                     lang=lang,
+                                     view=key[0] if key[0] in ("plugins", "menu") else "options")
+            with self._lock:
+                self._options[key] = opts
+                self._store_configs(configs(opts) if configs else opts, plugin_type)
+            self._save_catalog()
+            return deepcopy(opts)
+
+    def _healthy(self, opts, plugin_type):
+        if not self.health:
+            return opts
+        return self.health.filter_options(opts, plugin_type)
+
+    def _scan_options(self, lang, plugin_type, blacklist=None, preferred=None, max_opts=50):
+        if not self.health:
+            return PluginUIHelper.get_config_options(lang, plugin_type, blacklist, preferred,
+                                                     max_opts=max_opts)
+        # filter before truncating, broken plugins do not take slots
+        opts = PluginUIHelper.get_config_options(lang, plugin_type, blacklist, preferred,
+                                                 max_opts=sys.maxsize)
+        return self._healthy(opts, plugin_type)[:max_opts]
+
+    def get_config_options(self, lang, plugin_type, blacklist=None, preferred=None, max_opts=50):
+        self._validate()
+        key = self._make_key(lang, plugin_type, blacklist, preferred, max_opts)
+        return self._get(key, lang, plugin_type,
+                         lambda: self._scan_options(lang, plugin_type, blacklist,
+                                                    preferred, max_opts))
+
+    def get_plugin_options(self, lang, plugin_type):
+        self._validate()
+        key = ("plugins",) + self._make_key(lang, plugin_type)
+
+        def _scan():
+            plugs = PluginUIHelper.get_plugin_options(lang, plugin_type)
+            if self.health:
+                status = self.health.check_all([p["engine"] for p in plugs], plugin_type)
+                plugs = [p for p in plugs if status[p["engine"]]]
+            return plugs
+
+        return self._get(key, lang, plugin_type, _scan)
+
+    def get_menu_options(self, lang, plugin_type, blacklist=None, preferred=None, max_opts=50):
+        """ flat and per plugin options from a single plugin scan
+
+        returns a dict with "options" (as get_config_options), "plugins"
+        (as get_plugin_options, blacklist applied) and their sizes in
+        "count" and "plugin_count", count is the number of options before
+        truncating to max_opts"""
+        self._validate()
+        key = ("menu",) + self._make_key(lang, plugin_type, blacklist, preferred, max_opts)
+        return self._get(key, lang, plugin_type,
+                         lambda: self._scan_menu(lang, plugin_type, blacklist, preferred, max_opts),
+                         configs=lambda menu: menu["plugins"])
+
+    def _scan_menu(self, lang, plugin_type, blacklist=None, preferred=None, max_opts=50):
+        preferred = preferred or []
+        if isinstance(preferred, str):
+            preferred = [preferred]
+        entries = self._healthy(PluginUIHelper.get_config_options(lang, plugin_type, blacklist,
+                                                                  max_opts=sys.maxsize),
+                                plugin_type)
+        plugins = group_plugin_options(entries, plugin_type)
+        # same ordering as PluginUIHelper, preferred engines moved to the front
+        opts = []
+        for plug in plugins:
+            if plug["engine"] in preferred:
+                opts = plug["options"] + opts
+            else:
+                opts = opts + plug["options"]
+        return {"options": opts[:max_opts],
+                "plugins": plugins,
+                "count": len(entries),
+                "plugin_count": len(plugins)}
+
+    def option2config(self, opt, plugin_type=None):
+        """ PluginUIHelper.option2config, also valid for options loaded from the catalog"""
+        with self._lock:
+            _, cfg = self._configs.get(hash_dict(opt), (None, None))
+        if cfg:
+            return deepcopy(cfg)
+        return PluginUIHelper.option2config(opt, plugin_type)
+
+    def prefetch(self, lang, stt_blacklist=None, stt_preferred=None,
+                 tts_blacklist=None, tts_preferred=None,
+                 stt=True, tts=True):
+        """ fill the cache in a background thread so menus render from memory"""
+
+        def _prefetch():
+            try:
+                if stt:
+                    self.get_config_options(lang, PluginTypes.STT, stt_blacklist, stt_preferred)
+                if tts:
+                    self.get_menu_options(lang, PluginTypes.TTS, tts_blacklist, tts_preferred)
+                LOG.debug(f"plugin options prefetched for lang: {lang}")
+            except Exception as e:
+                LOG.error(f"Failed to prefetch plugin options: {e}")
+
+        self._prefetch_thread = Thread(target=_prefetch, daemon=True)
+        self._prefetch_thread.start()
+
+    def clear(self):
+        with self._lock:
+            self._options = {}
+            self._configs = {}
+            self._fingerprint = None
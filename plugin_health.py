@@ -0,0 +1,154 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import json
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from os.path import isfile
+from threading import Lock
+
+from ovos_utils.log import LOG
+
+from .plugin_cache import get_installed_fingerprint
+from .utils import write_json_atomic
+
+# loads a plugin entry point in a clean interpreter, a plugin that hangs
+# or crashes on import can not take the skill down with it
+_PROBE = """
+import importlib, sys
+module, _, attr = sys.argv[1].partition(":")
+obj = importlib.import_module(module)
+for name in filter(None, attr.split(".")):
+    obj = getattr(obj, name)
+if not callable(obj):
+    raise TypeError(f"{sys.argv[1]} is not a plugin class")
+"""
+
+
+def get_entry_points(group: str):
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # python < 3.8
+        from importlib_metadata import entry_points
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        return eps.select(group=group)
+    return eps.get(group, [])
+
+
+def find_entry_point(module: str, plugin_type) -> dict:
+    """ entry point value and distribution version of an installed plugin,
+    None if no plugin of that type is registered under module"""
+    group = getattr(plugin_type, "value", plugin_type)
+    for ep in get_entry_points(group):
+        if ep.name == module:
+            dist = getattr(ep, "dist", None)
+            return {"value": ep.value,
+                    "version": getattr(dist, "version", None) or "unknown"}
+    return None
+
+
+class PluginHealth:
+    """ check that STT/TTS plugins can actually be loaded
+
+    every plugin entry point is imported in a subprocess with a timeout,
+    results are cached in cache_path per plugin version, failures are also
+    retried whenever the set of installed distributions changes since
+    installing a missing dependency fixes a plugin without a new version"""
+
+    def __init__(self, cache_path=None, timeout=30, max_workers=4):
+        self.cache_path = cache_path
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self._lock = Lock()
+        self._results = None  # "<plugin type>:<module>" -> result dict
+        self._fingerprint = None
+
+    def _load(self):
+        if self._results is not None:
+            return
+        self._results = {}
+        self._fingerprint = get_installed_fingerprint()
+        if self.cache_path and isfile(self.cache_path):
+            try:
+                with open(self.cache_path, encoding="utf-8") as f:
+                    self._results = json.load(f)
+            except Exception as e:
+                LOG.warning(f"Failed to read plugin health cache: {e}")
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        try:
+            write_json_atomic(self.cache_path, self._results, separators=(",", ":"))
+        except Exception as e:
+            LOG.warning(f"Failed to save plugin health cache: {e}")
+
+    def _probe(self, ep: dict) -> dict:
+        result = {"version": ep["version"], "ok": False, "error": "",
+                  "fingerprint": self._fingerprint}
+        try:
+            proc = subprocess.run([sys.executable, "-c", _PROBE, ep["value"]],
+                                  capture_output=True, text=True, timeout=self.timeout)
+            result["ok"] = proc.returncode == 0
+            if not result["ok"]:
+                lines = proc.stderr.strip().splitlines()
+                result["error"] = lines[-1] if lines else f"exit code {proc.returncode}"
+        except subprocess.TimeoutExpired:
+            result["error"] = f"load timed out after {self.timeout} seconds"
+        return result
+
+    def _cached(self, key: str, ep: dict):
+        result = self._results.get(key)
+        if not result or result.get("version") != ep["version"]:
+            return None
+        if not result.get("ok") and result.get("fingerprint") != self._fingerprint:
+            return None
+        return result
+
+    def check_all(self, modules, plugin_type) -> dict:
+        """ {module: bool}, unknown plugins are probed concurrently """
+        group = getattr(plugin_type, "value", plugin_type)
+        status = {}
+        pending = {}
+        with self._lock:
+            self._load()
+            for module in set(modules):
+                ep = find_entry_point(module, group)
+                if ep is None:
+                    status[module] = False
+                    continue
+                result = self._cached(f"{group}:{module}", ep)
+                if result is None:
+                    pending[module] = ep
+                else:
+                    status[module] = result["ok"]
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                results = dict(zip(pending, pool.map(self._probe, pending.values())))
+            with self._lock:
+                for module, result in results.items():
+                    if not result["ok"]:
+                        LOG.warning(f"plugin {module} failed to load: {result['error']}")
+                    self._results[f"{group}:{module}"] = result
+                    status[module] = result["ok"]
+                self._save()
+        return status
+
+    def check(self, module: str, plugin_type) -> bool:
+        return self.check_all([module], plugin_type)[module]
+
+    def filter_options(self, opts: list, plugin_type) -> list:
+        """ drop GUI options whose plugin is not installed or fails to load """
+        status = self.check_all([o["engine"] for o in opts], plugin_type)
+        return [o for o in opts if status[o["engine"]]]
@@ -0,0 +1,244 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""rank installed STT/TTS plugins by measured performance on this device
+
+each plugin is loaded in its own interpreter and run once on a short
+fixture, the real time factor, latency (time to first audio for TTS) and
+peak RSS are stored per plugin version and used to pick setup defaults
+
+usage (build time or from a shell on the device):
+
+    python -m skill_ovos_setup.plugin_ranking --lang en-us
+"""
+import json
+import math
+import os
+import struct
+import subprocess
+import sys
+import wave
+from os.path import isfile, join
+from tempfile import TemporaryDirectory
+from threading import Lock
+
+from ovos_utils.log import LOG
+
+from .plugin_health import find_entry_point, get_entry_points
+from .utils import write_json_atomic
+
+SKILL_ID = "skill-ovos-setup.openvoiceos"
+FIXTURE_SENTENCE = "Welcome to your new device, let's get you set up."
+
+_BENCHMARK = r"""
+import importlib, json, os, resource, sys, time, wave
+kind, value, lang, fixture, workdir = sys.argv[1:6]
+module, _, attr = value.partition(":")
+clazz = importlib.import_module(module)
+for name in filter(None, attr.split(".")):
+    clazz = getattr(clazz, name)
+
+start = time.monotonic()
+if kind == "tts":
+    engine = clazz(lang, {"lang": lang})
+    load = time.monotonic() - start
+    out = os.path.join(workdir, "bench." + (getattr(engine, "audio_ext", None) or "wav"))
+    start = time.monotonic()
+    path, _ = engine.get_tts(fixture, out)
+    latency = time.monotonic() - start
+    if not path or not os.path.isfile(str(path)):
+        raise RuntimeError("no audio was synthesized")
+    try:
+        with wave.open(str(path)) as w:
+            duration = w.getnframes() / w.getframerate()
+    except Exception:  # not a wav file, no real time factor
+        duration = None
+else:
+    from speech_recognition import AudioData
+    engine = clazz({"lang": lang})
+    load = time.monotonic() - start
+    with wave.open(fixture) as w:
+        duration = w.getnframes() / w.getframerate()
+        audio = AudioData(w.readframes(w.getnframes()), w.getframerate(), w.getsampwidth())
+    start = time.monotonic()
+    engine.execute(audio, lang)
+    latency = time.monotonic() - start
+
+print(json.dumps({"load": load, "latency": latency,
+                  "rtf": latency / duration if duration else None,
+                  "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+
+def _kind(plugin_type) -> str:
+    return "tts" if getattr(plugin_type, "value", plugin_type).endswith("tts") else "stt"
+
+
+def get_ranking_path() -> str:
+    """ engine_ranking.json next to the skill settings.json """
+    from ovos_config.locations import get_xdg_config_save_path
+    return join(get_xdg_config_save_path(), "skills", SKILL_ID, "engine_ranking.json")
+
+
+def get_total_ram_mb() -> float:
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (ValueError, OSError, AttributeError):
+        return float("inf")
+
+
+def write_fixture_wav(path: str, seconds: float = 3.0, rate: int = 16000):
+    """ deterministic speech band audio for STT benchmarks, transcription
+    quality is not measured, only how fast a plugin processes the audio"""
+    frames = bytearray()
+    for i in range(int(seconds * rate)):
+        t = i / rate
+        sample = 0.3 * math.sin(2 * math.pi * 220 * t) * math.sin(2 * math.pi * 3 * t)
+        frames += struct.pack("<h", int(sample * 32767))
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(bytes(frames))
+
+
+class EngineRanking:
+    """ benchmark results of installed plugins, cached per plugin version
+
+    an engine fits the device if it runs faster than real time and its
+    peak memory stays under max_ram_fraction of the total RAM"""
+
+    def __init__(self, path=None, timeout=180, max_rtf=1.0, max_ram_fraction=0.3):
+        self.path = path
+        self.timeout = timeout
+        self.max_rtf = max_rtf
+        self.max_ram_fraction = max_ram_fraction
+        self._lock = Lock()
+        self._scores = None  # "<plugin type>:<module>" -> result dict
+
+    @property
+    def scores(self) -> dict:
+        with self._lock:
+            if self._scores is None:
+                self._scores = {}
+                if self.path and isfile(self.path):
+                    try:
+                        with open(self.path, encoding="utf-8") as f:
+                            self._scores = json.load(f)
+                    except Exception as e:
+                        LOG.warning(f"Failed to read engine ranking: {e}")
+            return self._scores
+
+    def _save(self):
+        if self.path:
+            try:
+                write_json_atomic(self.path, self._scores, indent=2)
+            except Exception as e:
+                LOG.warning(f"Failed to save engine ranking: {e}")
+
+    def _run(self, ep: dict, kind: str, lang: str) -> dict:
+        result = {"version": ep["version"], "lang": lang, "ok": False, "error": ""}
+        with TemporaryDirectory() as workdir:
+            if kind == "tts":
+                fixture = FIXTURE_SENTENCE
+            else:
+                fixture = join(workdir, "fixture.wav")
+                write_fixture_wav(fixture)
+            try:
+                proc = subprocess.run([sys.executable, "-c", _BENCHMARK, kind,
+                                       ep["value"], lang, fixture, workdir],
+                                      capture_output=True, text=True, timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                result["error"] = f"benchmark timed out after {self.timeout} seconds"
+                return result
+        if proc.returncode != 0:
+            lines = proc.stderr.strip().splitlines()
+            result["error"] = lines[-1] if lines else f"exit code {proc.returncode}"
+            return result
+        result.update(json.loads(proc.stdout.strip().splitlines()[-1]))
+        result["ok"] = True
+        return result
+
+    def benchmark(self, module: str, plugin_type, lang: str = "en-us", force=False) -> dict:
+        """ measure a single plugin, previous results are reused for the same version"""
+        group = getattr(plugin_type, "value", plugin_type)
+        key = f"{group}:{module}"
+        ep = find_entry_point(module, group)
+        if ep is None:
+            return None
+        cached = self.scores.get(key)
+        if not force and cached and cached.get("version") == ep["version"] \
+                and cached.get("lang") == lang:
+            return cached
+        LOG.info(f"benchmarking {module}")
+        result = self._run(ep, _kind(group), lang)
+        if not result["ok"]:
+            LOG.warning(f"benchmark of {module} failed: {result['error']}")
+        with self._lock:
+            self._scores[key] = result
+            self._save()
+        return result
+
+    def benchmark_all(self, plugin_type, lang: str = "en-us", modules=None, force=False) -> dict:
+        """ measure every installed plugin of a type, one at a time so
+        results are not skewed by plugins competing for the CPU"""
+        group = getattr(plugin_type, "value", plugin_type)
+        if modules is None:
+            modules = sorted({ep.name for ep in get_entry_points(group)})
+        return {m: self.benchmark(m, group, lang, force) for m in modules}
+
+    def fits(self, score: dict) -> bool:
+        if not score or not score.get("ok"):
+            return False
+        if score.get("rtf") is not None and score["rtf"] > self.max_rtf:
+            return False
+        return score.get("rss_mb", 0) <= get_total_ram_mb() * self.max_ram_fraction
+
+    def rank(self, plugin_type, candidates=None) -> list:
+        """ benchmarked plugins that fit this device, fastest first
+
+        STT is ranked by real time factor, TTS by time to first audio"""
+        group = getattr(plugin_type, "value", plugin_type)
+        metric = "latency" if _kind(group) == "tts" else "rtf"
+        ranked = []
+        for key, score in self.scores.items():
+            g, _, module = key.partition(":")
+            if g != group or (candidates is not None and module not in candidates):
+                continue
+            if self.fits(score):
+                value = score.get(metric)
+                ranked.append((value if value is not None else score["latency"], module))
+        return [module for _, module in sorted(ranked)]
+
+    def best(self, plugin_type, candidates=None):
+        ranked = self.rank(plugin_type, candidates)
+        return ranked[0] if ranked else None
+
+
+def main():
+    import argparse
+    from ovos_plugin_manager.utils.ui import PluginTypes
+
+    parser = argparse.ArgumentParser(description="benchmark installed STT/TTS plugins")
+    parser.add_argument("--lang", default="en-us")
+    parser.add_argument("--path", default=None,
+                        help=f"where to store the results (default: {get_ranking_path()})")
+    parser.add_argument("--force", action="store_true", help="ignore previous results")
+    args = parser.parse_args()
+    ranking = EngineRanking(args.path or get_ranking_path())
+    for plugin_type in (PluginTypes.STT, PluginTypes.TTS):
+        ranking.benchmark_all(plugin_type, args.lang, force=args.force)
+        print(f"{_kind(plugin_type)}: {ranking.rank(plugin_type)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from threading import Lock
+from time import monotonic
+
+from ovos_utils.log import LOG
+
+
+class ProbeCache:
+    """ run slow connectivity/pairing checks concurrently
+
+    probes are started with submit() as early as possible and collected with
+    get(), waiting at most timeout seconds, results are reused for ttl seconds
+
+    waiting on several probes is bounded by the slowest one, not their sum"""
+
+    def __init__(self, ttl=15, timeout=10, max_workers=3, timeline=None):
+        self.ttl = ttl
+        self.timeout = timeout
+        self.timeline = timeline
+        self._lock = Lock()
+        self._probes = {}  # name -> (Future, submitted monotonic timestamp)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="setup-probe")
+
+    def _run(self, name, func, args):
+        start = monotonic()
+        try:
+            return func(*args)
+        finally:
+            if self.timeline:
+                self.timeline.record("probe", name, start)
+
+    def submit(self, name, func, *args):
+        """ start a probe in the background, unless a fresh result exists"""
+        with self._lock:
+            probe = self._probes.get(name)
+            if probe:
+                future, submitted = probe
+                if not future.done() or monotonic() - submitted < self.ttl:
+                    return future
+            future = self._executor.submit(self._run, name, func, args)
+            self._probes[name] = (future, monotonic())
+            return future
+
+    def get(self, name, func, *args, default=False, timeout=None):
+        """ result of a probe, default if it failed or did not finish in time"""
+        future = self.submit(name, func, *args)
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except TimeoutError:
+            LOG.warning(f"probe '{name}' timed out, assuming {default}")
+        except Exception as e:
+            LOG.error(f"probe '{name}' failed: {e}")
+        return default
+
+    def invalidate(self, *names):
+        """ forget cached results, all of them if no name is given"""
+        with self._lock:
+            for name in names or list(self._probes):
+                self._probes.pop(name, None)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,81 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""headless setup from a provisioning profile
+
+a profile placed next to the skill settings fully determines the setup,
+the wizard is skipped and everything is applied in one config commit
+
+    {"lang": "en-us",
+     "backend": "offline" or {"type": "personal", "url": "http://192.168.1.2:6712"},
+     "stt": "offline", "online" or {"module": "ovos-stt-plugin-vosk", "ovos-stt-plugin-vosk": {}},
+     "tts": "offline_male", "offline_female", "online_male", "online_female"
+            or {"module": "ovos-tts-plugin-piper", "ovos-tts-plugin-piper": {}}}
+
+the named presets are the simplified voice route of the wizard, including
+the engines distros set in skill settings
+"""
+import json
+
+PROFILE_FILE = "provisioning.json"
+STT_PRESETS = ("offline", "online")
+TTS_PRESETS = ("offline_male", "offline_female", "online_male", "online_female")
+BACKENDS = ("offline", "personal")
+
+
+def _engine(profile, kind, presets):
+    engine = profile.get(kind)
+    if isinstance(engine, str):
+        if engine not in presets:
+            raise ValueError(f"unknown {kind} preset {engine}, expected one of {presets}")
+        return engine
+    if not isinstance(engine, dict) or not engine.get("module"):
+        raise ValueError(f"{kind} must be a preset or a config with a module")
+    return dict(engine)
+
+
+def validate_profile(profile: dict) -> dict:
+    """ normalized copy of profile, raise ValueError if it does not fully
+    determine backend, language, STT and TTS"""
+    if not isinstance(profile, dict):
+        raise ValueError("provisioning profile must be a json object")
+    missing = [k for k in ("lang", "backend", "stt", "tts") if not profile.get(k)]
+    if missing:
+        raise ValueError(f"provisioning profile is missing {', '.join(missing)}")
+
+    backend = profile["backend"]
+    if isinstance(backend, str):
+        backend = {"type": backend}
+    backend = dict(backend)
+    if backend.get("type") not in BACKENDS:
+        raise ValueError(f"unknown backend {backend.get('type')}, expected one of {BACKENDS}")
+    if backend["type"] == "personal":
+        url = backend.get("url")
+        if not url:
+            raise ValueError("personal backend needs an url")
+        if not url.startswith("http"):
+            backend["url"] = f"http://{url}"
+
+    return {"lang": profile["lang"].lower().replace("_", "-"),
+            "backend": backend,
+            "stt": _engine(profile, "stt", STT_PRESETS),
+            "tts": _engine(profile, "tts", TTS_PRESETS)}
+
+
+def load_profile(path: str) -> dict:
+    """ validated profile, None if there is no profile file """
+    try:
+        with open(path, encoding="utf-8") as f:
+            profile = json.load(f)
+    except FileNotFoundError:
+        return None
+    return validate_profile(profile)
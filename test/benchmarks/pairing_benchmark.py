@@ -0,0 +1,204 @@
+"""end to end benchmark of pairing with a personal backend
+
+the setup wizard runs against MockPersonalBackend over http, the personal
+backend screens are answered automatically, also when a failed pairing
+restarts the wizard, so every scenario runs until the device is paired or
+PAIR_TIMEOUT expires
+
+per scenario it records whether the device got paired, the time from
+submitting the backend url to the first pairing code and to paired, how
+often the PairingManager callbacks ran, the requests the backend got and
+over how many connections
+
+    python test/benchmarks/pairing_benchmark.py                    # compare
+    python test/benchmarks/pairing_benchmark.py --update-baseline  # record
+"""
+import argparse
+import json
+import sys
+from contextlib import ExitStack
+from os.path import dirname, join
+from threading import Event, Lock, Timer
+from time import monotonic
+from unittest.mock import patch
+
+from ovos_bus_client import Message
+from setup_benchmark import TIMING_GATE, SetupRun, gui_event
+
+from skill_ovos_setup.mock_backend import MockPersonalBackend
+
+BASELINE = join(dirname(__file__), "pairing_baseline.json")
+PAIR_TIMEOUT = 5
+LATENCY_FACTOR, LATENCY_SLACK = 2.0, 0.25
+
+SCENARIOS = {
+    "instant": {},
+    "slow_link": {"backend": {"latency": 0.1, "handshake": 0.1}},
+    # the first pairing code request fails, PairingManager restarts pairing
+    "code_retry": {"fail": ("code", 1)},
+    # one activation poll fails, the next one should pair
+    "flaky_activation": {"fail": ("activate", 1, 503)},
+    # the user enters the code on the backend after a few polls
+    "pending_activation": {"backend": {"activate_after": 3}},
+    # the user enters the code and confirms it on screen
+    "confirmed_on_screen": {"backend": {"activate_after": 1000}, "confirm": True},
+}
+CALLBACKS = ("on_pairing_code", "on_pairing_success", "on_pairing_error")
+
+
+class PairingRun:
+    """ answers the backend screens and records the pairing callbacks """
+
+    def __init__(self, run, backend, confirm=False):
+        self.run = run
+        self.backend = backend
+        self.confirm = confirm
+        self.calls = {name: [] for name in CALLBACKS}
+        self.submitted = []
+        self.paired = Event()
+        self._lock = Lock()
+        self._state = None
+        self._answers = {
+            "BackendSelect": (gui_event("mycroft.device.set.backend"), {"backend": "personal"}),
+            "BackendPersonal": (gui_event("mycroft.device.confirm.backend"), {"backend": "personal"}),
+            "BackendPersonalHost": (gui_event("mycroft.device.local.setup.host.address"),
+                                    {"host_address": backend.url}),
+        }
+
+    def instrument(self, stack, clazz):
+        for name in CALLBACKS:
+            stack.enter_context(patch.object(clazz, name, self._recorded(name, getattr(clazz, name))))
+
+    def _recorded(self, name, original):
+        def callback(skill, *args, **kwargs):
+            # pairing threads of a previous run may still call back
+            if skill is self.run.skill:
+                with self._lock:
+                    self.calls[name].append(monotonic())
+                if name == "on_pairing_success":
+                    self.paired.set()
+                elif name == "on_pairing_code" and self.confirm:
+                    Timer(0, self._confirm).start()
+            return original(skill, *args, **kwargs)
+
+        return callback
+
+    def on_message(self, serialized):
+        msg = json.loads(serialized)
+        if msg["type"] != "gui.value.set":
+            return
+        state = msg["data"].get("state")
+        with self._lock:
+            # every value set repeats the whole page data, answer a screen once
+            shown, self._state = state != self._state, state
+        answer = self._answers.get(state)
+        if answer and shown:
+            # answered from another thread, like a user tapping the screen
+            Timer(0, self._answer, answer).start()
+
+    def _confirm(self):
+        self.backend.confirm()
+        self.run.bus.emit(Message(gui_event("mycroft.device.pairing.confirm")))
+
+    def _answer(self, msg_type, data):
+        if msg_type.endswith("host.address"):
+            with self._lock:
+                self.submitted.append(monotonic())
+        self.run.bus.emit(Message(msg_type, data))
+
+    def result(self) -> dict:
+        with self._lock:
+            start = self.submitted[0] if self.submitted else None
+            codes, success, errors = (self.calls[n] for n in CALLBACKS)
+
+            def since_start(times):
+                return round(times[0] - start, 4) if times and start else None
+
+            requests = {k: v for k, v in self.backend.counts().items() if k}
+            return {"paired": bool(success),
+                    "code_s": since_start(codes),
+                    "paired_s": since_start(success),
+                    "codes": len(codes),
+                    "errors": len(errors),
+                    "restarts": max(0, len(self.submitted) - 1),
+                    "requests": requests,
+                    "connections": self.backend.connections}
+
+
+def run_scenario(name) -> dict:
+    from skill_ovos_setup import PairingSkill
+    config = SCENARIOS[name]
+    with MockPersonalBackend(seed=0, **config.get("backend", {})) as backend, \
+            SetupRun(backend=backend) as run, ExitStack() as stack:
+        if "fail" in config:
+            backend.fail(*config["fail"])
+        pairing = PairingRun(run, backend, config.get("confirm", False))
+        pairing.instrument(stack, PairingSkill)
+        run.bus.on("message", pairing.on_message)
+        run.boot("page:BackendSelect")
+        pairing.paired.wait(PAIR_TIMEOUT)
+        return pairing.result()
+
+
+def load_baseline(path=BASELINE) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def compare(name, result, baseline, timing=TIMING_GATE) -> list:
+    """ human readable regressions of a scenario against the baseline """
+    base = baseline.get(name)
+    if base is None:
+        return [f"{name}: no baseline, run with --update-baseline"]
+    regressions = []
+    if base["paired"] and not result["paired"]:
+        regressions.append(f"{name}: not paired within {PAIR_TIMEOUT} seconds")
+    # reused connections depend on keep-alive timing, see setup_benchmark.TIMING_GATE
+    keys = ("errors", "restarts", "connections") if timing else ("errors", "restarts")
+    for key in keys:
+        if result[key] > base.get(key, result[key]):
+            regressions.append(f"{name}: {key} {base[key]} -> {result[key]}")
+    for endpoint, count in result["requests"].items():
+        # polls depend on timing, only a pairing code request more is a regression
+        if endpoint != "activate" and count > base["requests"].get(endpoint, 0):
+            regressions.append(f"{name}: {endpoint} requests {base['requests'].get(endpoint, 0)} -> {count}")
+    if timing and base["paired_s"] is not None and result["paired_s"] is not None and \
+            result["paired_s"] > base["paired_s"] * LATENCY_FACTOR + LATENCY_SLACK:
+        regressions.append(f"{name}: paired after {base['paired_s']:.3f}s -> {result['paired_s']:.3f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark pairing with a personal backend")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run, can be repeated (default: all)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help=f"store the results in {BASELINE}")
+    args = parser.parse_args()
+
+    baseline = load_baseline()
+    regressions = []
+    for name in args.scenario or SCENARIOS:
+        result = run_scenario(name)
+        paired = f"paired in {result['paired_s']:.3f}s" if result["paired"] else "NOT PAIRED"
+        print(f"{name:<20} {paired:<18} code {result['codes']}x, errors {result['errors']}, "
+              f"restarts {result['restarts']}, requests {result['requests']}, "
+              f"connections {result['connections']}")
+        if args.update_baseline:
+            baseline[name] = result
+        else:
+            regressions += compare(name, result, baseline)
+    if args.update_baseline:
+        with open(BASELINE, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
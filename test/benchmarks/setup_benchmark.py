@@ -0,0 +1,403 @@
+"""end to end benchmark of the setup wizard
+
+every setup path is driven on a FakeBus with synthetic GUI events, plugin
+discovery and pairing are stubbed so only the skill itself is measured
+
+per step it records the latency until the next page (or end of setup),
+the number of bus messages, config writes and memory allocated, results
+are compared against baseline.json and regressions fail the run,
+with BENCHMARK_TIMING=0 latency and allocations are only printed, not
+compared, counts do not depend on the machine and are always compared
+
+    python test/benchmarks/setup_benchmark.py                    # compare
+    python test/benchmarks/setup_benchmark.py --update-baseline  # record
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from collections import Counter
+from os.path import dirname, join
+from threading import Event, Lock, Timer
+from time import monotonic
+from unittest.mock import MagicMock, patch
+
+from ovos_bus_client import Message
+from ovos_config.models import LocalConf
+from ovos_utils.messagebus import FakeBus
+
+BASELINE = join(dirname(__file__), "baseline.json")
+SKILL_ID = "skill-ovos-setup.openvoiceos"
+TIME_SCALE = 0.01  # fixed GUI linger delays are shortened, they are not what is measured
+SPEECH_SECONDS = 0.05  # fake audio service reports end of speech after this long
+SETTLE_SECONDS = 0.75  # bus must be idle this long before a step is over
+STEP_TIMEOUT = 30
+
+# regressions are reported when a step exceeds baseline * factor + slack,
+# latency baselines are first scaled by the calibration ratio, see calibrate()
+LATENCY_FACTOR, LATENCY_SLACK = 2.0, 0.25
+ALLOC_FACTOR, ALLOC_SLACK_KB = 1.5, 512
+# shared CI runners are too noisy to gate on timings
+TIMING_GATE = os.environ.get("BENCHMARK_TIMING", "1") != "0"
+
+STT_OPTIONS = [{"engine": "bench-stt-plugin", "plugin_name": "Bench STT", "display_name": "Bench STT",
+                "offline": True, "lang": "en", "plugin_type": "stt"}]
+TTS_OPTIONS = [{"engine": "bench-tts-plugin", "plugin_name": "Bench TTS", "display_name": f"Voice {i}",
+                "offline": True, "gender": "female", "lang": "en", "plugin_type": "tts"}
+               for i in range(3)]
+SETTINGS = {"preferred_stt_engine": "bench-stt-plugin",
+            "preferred_tts_engine": "bench-tts-plugin",
+            "prefetch_stt_model": False,
+            "warmup_engines": False,
+            # the first run marker is stored with a plain write, the settings
+            # file watcher could reload a truncated file while the wizard starts
+            "__mycroft_skill_firstrun": False}
+PERSONAL_HOST = "http://127.0.0.1:6712"
+
+
+def gui_event(name):
+    return f"{SKILL_ID}.{name}"
+
+
+class FakePairingManager:
+    """ pairs instantly once activation is checked """
+
+    def __init__(self, bus, code_callback=None, success_callback=None, end_callback=None,
+                 start_callback=None, restart_callback=None, error_callback=None):
+        self.bus = bus
+        self.code_callback = code_callback
+        self.success_callback = success_callback
+        self.start_callback = start_callback
+        self.api = MagicMock()
+        self.uuid = "bench"
+        self.data = None
+        self.pairing_url = ""
+        self.activator_cancelled = False
+        self.counter_lock = Lock()
+        self.count = -1
+
+    def set_api_url(self, url, backend_type=None):
+        self.pairing_url = url
+
+    def kickoff_pairing(self):
+        self.data = {"code": "ABC123", "token": "bench"}
+        self.count = 0
+        self.start_callback()
+        self.code_callback("ABC123")
+
+    def check_for_activate(self):
+        Timer(0, self.success_callback).start()
+
+    def shutdown(self):
+        pass
+
+
+def _plugin_ui_helper():
+    helper = MagicMock()
+    helper.get_config_options.side_effect = \
+        lambda lang, plugin_type, *args, **kwargs: \
+        [dict(o) for o in (TTS_OPTIONS if "tts" in str(plugin_type).lower() else STT_OPTIONS)]
+    helper.option2config.return_value = {}
+    return helper
+
+
+class SetupRun:
+    """ one setup run on a fresh FakeBus, config and XDG directories
+
+    pairing is instant unless backend (a MockPersonalBackend) is given,
+    then the real PairingManager and DeviceApi talk to it over http"""
+
+    def __init__(self, connected=True, backend=None):
+        self.connected = connected
+        self.backend = backend
+        self.results = []
+        self._lock = Lock()
+        self._target = None
+        self._reached = Event()
+        self._last_message = monotonic()
+        self._messages = Counter()
+        self.skill = None
+
+    def __enter__(self):
+        from skill_ovos_setup import PairingSkill
+        self._tmp = tempfile.TemporaryDirectory()
+        tmp = self._tmp.name
+        settings = join(tmp, "config", "mycroft", "skills", SKILL_ID, "settings.json")
+        os.makedirs(dirname(settings))
+        with open(settings, "w") as f:
+            json.dump(SETTINGS, f)
+        self._patches = [
+            patch.dict(os.environ, {"XDG_CONFIG_HOME": join(tmp, "config"),
+                                    "XDG_DATA_HOME": join(tmp, "data"),
+                                    "XDG_CACHE_HOME": join(tmp, "cache")}),
+            patch("skill_ovos_setup.MycroftUserConfig",
+                  side_effect=lambda: LocalConf(join(tmp, "mycroft.conf"))),
+            patch("skill_ovos_setup.is_connected", return_value=self.connected),
+            patch("ovos_backend_client.pairing.is_paired", return_value=False),
+            patch("skill_ovos_setup.plugin_cache.PluginUIHelper", _plugin_ui_helper()),
+            patch("skill_ovos_setup.plugin_health.PluginHealth.check_all",
+                  lambda self, modules, plugin_type: {m: True for m in modules}),
+            patch.object(PairingSkill, "schedule_continuation", self._scaled_continuation(PairingSkill)),
+        ]
+        if self.backend is None:
+            self._patches += [
+                patch("ovos_backend_client.pairing.PairingManager", FakePairingManager),
+                patch("ovos_backend_client.api.DeviceApi"),
+            ]
+        else:
+            import time
+            from types import SimpleNamespace
+            from ovos_backend_client.identity import IdentityManager
+            from skill_ovos_setup.activation import ActivationScheduler
+            interval = ActivationScheduler.interval
+            self._patches += [
+                patch.object(IdentityManager, "IDENTITY_FILE", join(tmp, "identity", "identity2.json")),
+                patch.object(IdentityManager, "_IdentityManager__identity", None),
+                patch.object(ActivationScheduler, "interval",
+                             lambda scheduler, attempt: interval(scheduler, attempt) * TIME_SCALE),
+                # retries after a failed pairing code request sleep
+                patch("ovos_backend_client.pairing.time",
+                      SimpleNamespace(sleep=lambda s: time.sleep(s * TIME_SCALE),
+                                      monotonic=time.monotonic)),
+            ]
+        for p in self._patches:
+            p.start()
+        self.bus = FakeBus()
+        self.bus.on("message", self._on_message)
+        self.bus.on("speak", self._fake_speech)
+        self.bus.on("mycroft.audio.queue", self._fake_speech)
+        tracemalloc.start()
+        return self
+
+    def __exit__(self, *args):
+        tracemalloc.stop()
+        if self.skill:
+            self.skill.shutdown()
+        for p in reversed(self._patches):
+            p.stop()
+        self._tmp.cleanup()
+
+    @staticmethod
+    def _scaled_continuation(clazz):
+        original = clazz.schedule_continuation
+
+        def schedule_continuation(self, delay, callback, *args):
+            return original(self, delay * TIME_SCALE, callback, *args)
+
+        return schedule_continuation
+
+    def _fake_speech(self, message):
+        Timer(SPEECH_SECONDS, self.bus.emit,
+              (message.forward("recognizer_loop:audio_output_end"),)).start()
+
+    def _on_message(self, serialized):
+        msg = json.loads(serialized)
+        with self._lock:
+            self._last_message = monotonic()
+            self._messages[msg["type"]] += 1
+            target = self._target
+        if target is None or self._reached.is_set():
+            return
+        if target.startswith("page:"):
+            # every screen is a state of the ProcessLoader page
+            if msg["type"] == "gui.value.set" and msg["data"].get("state") == target[5:]:
+                self._reached.set()
+        elif msg["type"] == target:
+            self._reached.set()
+
+    def _settle(self):
+        while True:
+            with self._lock:
+                idle = monotonic() - self._last_message
+            if idle >= SETTLE_SECONDS:
+                return
+            Event().wait(SETTLE_SECONDS - idle)
+
+    def boot(self, until):
+        from skill_ovos_setup import PairingSkill
+
+        def _start():
+            self.skill = PairingSkill()
+            self.skill._startup(self.bus, SKILL_ID)
+
+        return self.step("boot", until, action=_start)
+
+    def step(self, name, until, event=None, data=None, action=None):
+        """ emit event (or call action) and measure until the target screen is
+        shown ("page:<Name>") or the target message type is emitted"""
+        self._settle()
+        with self._lock:
+            self._messages.clear()
+            self._target = until
+        self._reached.clear()
+        if hasattr(tracemalloc, "reset_peak"):  # python >= 3.9
+            tracemalloc.reset_peak()
+        mem_start = tracemalloc.get_traced_memory()[0]
+        start = monotonic()
+        if event:
+            self.bus.emit(Message(event, data or {}))
+        else:
+            action()
+        if not self._reached.wait(STEP_TIMEOUT):
+            raise AssertionError(f"{name}: {until} not reached in {STEP_TIMEOUT} seconds")
+        latency = monotonic() - start
+        self._settle()
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            self._target = None
+            messages = sum(self._messages.values())
+            config_writes = self._messages["configuration.patch"]
+        result = {"step": name,
+                  "latency": round(latency, 4),
+                  "messages": messages,
+                  "config_writes": config_writes,
+                  "alloc_kb": round(max(peak, current) - mem_start) // 1024}
+        self.results.append(result)
+        return result
+
+
+# setup paths, each one drives a complete setup run
+def offline_defaults(run):
+    run.boot("page:BackendSelect")
+    run.step("select_backend", "page:BackendOffline",
+             gui_event("mycroft.device.set.backend"), {"backend": "offline"})
+    run.step("confirm_backend", "page:DefaultsMenu",
+             gui_event("mycroft.device.confirm.backend"), {"backend": "offline"})
+    run.step("confirm_defaults", "ovos.setup.finished",
+             gui_event("mycroft.device.quick.setup.confirm"),
+             {"stt_engine": STT_OPTIONS[0]["engine"], "tts_engine": TTS_OPTIONS[0]["engine"]})
+
+
+def custom_engines(run):
+    run.boot("page:BackendSelect")
+    run.step("select_backend", "page:BackendOffline",
+             gui_event("mycroft.device.set.backend"), {"backend": "offline"})
+    run.step("confirm_backend", "page:DefaultsMenu",
+             gui_event("mycroft.device.confirm.backend"), {"backend": "offline"})
+    run.step("customize", "page:STTListMenu", gui_event("mycroft.device.quick.setup.customize"))
+    run.step("select_stt", "page:TTSListMenuSingle",
+             gui_event("mycroft.device.confirm.stt"), STT_OPTIONS[0])
+    run.step("select_tts", "ovos.setup.finished",
+             gui_event("mycroft.device.confirm.tts"), TTS_OPTIONS[0])
+
+
+def personal_backend(run):
+    run.boot("page:BackendSelect")
+    run.step("select_backend", "page:BackendPersonal",
+             gui_event("mycroft.device.set.backend"), {"backend": "personal"})
+    run.step("confirm_backend", "page:BackendPersonalHost",
+             gui_event("mycroft.device.confirm.backend"), {"backend": "personal"})
+    run.step("pair", "ovos.setup.finished",
+             gui_event("mycroft.device.local.setup.host.address"), {"host_address": PERSONAL_HOST})
+
+
+def wifi_skip(run):
+    run.boot("page:LoadingScreen")
+    run.step("skip_wifi", "ovos.setup.finished", "ovos.phal.wifi.plugin.skip.setup")
+
+
+PATHS = {
+    "offline_defaults": (offline_defaults, True),
+    "custom_engines": (custom_engines, True),
+    "personal_backend": (personal_backend, True),
+    "wifi_skip": (wifi_skip, False),
+}
+
+
+_primed = False
+
+
+def run_path(name) -> list:
+    global _primed
+    if not _primed:
+        # the first skill instance in a process fills module level caches,
+        # do not charge that to whichever path happens to run first
+        with SetupRun(connected=False) as run:
+            wifi_skip(run)
+        _primed = True
+    drive, connected = PATHS[name]
+    with SetupRun(connected=connected) as run:
+        drive(run)
+    return run.results
+
+
+def calibrate(rounds=20) -> float:
+    """ seconds per framework stack introspection (dig_for_message, LOG),
+    it dominates message handling and depends on the CPU and on how many
+    modules the process has loaded, a pytest run loads a lot more"""
+    from ovos_bus_client.message import dig_for_message
+    start = monotonic()
+    for _ in range(rounds):
+        dig_for_message()
+    return (monotonic() - start) / rounds
+
+
+def load_baseline(path=BASELINE) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"calibration": None, "paths": {}}
+
+
+def compare(name, results, baseline, calibration=None, timing=TIMING_GATE) -> list:
+    """ human readable regressions of results against the baseline of a path """
+    expected = {r["step"]: r for r in baseline["paths"].get(name, [])}
+    scale = 1.0
+    if calibration and baseline.get("calibration"):
+        scale = max(1.0, calibration / baseline["calibration"])
+    regressions = []
+    for result in results:
+        base = expected.get(result["step"])
+        if base is None:
+            regressions.append(f"{name}.{result['step']}: no baseline, run with --update-baseline")
+            continue
+        for key in ("messages", "config_writes"):
+            if result[key] > base[key]:
+                regressions.append(f"{name}.{result['step']}: {key} {base[key]} -> {result[key]}")
+        if not timing:
+            continue
+        if result["latency"] > base["latency"] * scale * LATENCY_FACTOR + LATENCY_SLACK:
+            regressions.append(f"{name}.{result['step']}: latency "
+                               f"{base['latency']:.3f}s -> {result['latency']:.3f}s")
+        if result["alloc_kb"] > base["alloc_kb"] * ALLOC_FACTOR + ALLOC_SLACK_KB:
+            regressions.append(f"{name}.{result['step']}: alloc_kb "
+                               f"{base['alloc_kb']} -> {result['alloc_kb']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark the setup wizard end to end")
+    parser.add_argument("--path", action="append", choices=sorted(PATHS),
+                        help="setup path to run, can be repeated (default: all)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help=f"store the results in {BASELINE}")
+    args = parser.parse_args()
+
+    baseline = load_baseline()
+    calibration = calibrate()
+    regressions = []
+    for name in args.path or PATHS:
+        results = run_path(name)
+        print(name)
+        for r in results:
+            print(f"  {r['step']:<18} {r['latency']:>8.3f}s {r['messages']:>5} msgs "
+                  f"{r['config_writes']:>3} writes {r['alloc_kb']:>7} KB")
+        if args.update_baseline:
+            baseline["paths"][name] = results
+        else:
+            regressions += compare(name, results, baseline, calibration)
+    if args.update_baseline:
+        baseline["calibration"] = calibration
+        with open(BASELINE, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+import unittest
+
+from pairing_benchmark import SCENARIOS, compare, load_baseline, run_scenario
+
+
+class TestPairingBenchmark(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.baseline = load_baseline()
+
+    def check(self, name):
+        regressions = compare(name, run_scenario(name), self.baseline)
+        self.assertEqual(regressions, [], "\n".join(regressions))
+
+    def test_scenarios_covered(self):
+        self.assertEqual(sorted(self.baseline), sorted(SCENARIOS))
+
+    def test_instant(self):
+        self.check("instant")
+
+    def test_slow_link(self):
+        self.check("slow_link")
+
+    def test_code_retry(self):
+        self.check("code_retry")
+
+    def test_flaky_activation(self):
+        self.check("flaky_activation")
+
+    def test_pending_activation(self):
+        self.check("pending_activation")
+
+    def test_confirmed_on_screen(self):
+        self.check("confirmed_on_screen")
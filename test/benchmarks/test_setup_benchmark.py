@@ -0,0 +1,38 @@
+import unittest
+
+from setup_benchmark import PATHS, calibrate, compare, load_baseline, run_path
+
+
+class TestSetupBenchmark(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.baseline = load_baseline()
+        cls.calibration = calibrate()
+
+    def check(self, name):
+        regressions = compare(name, run_path(name), self.baseline, self.calibration)
+        self.assertEqual(regressions, [], "\n".join(regressions))
+
+    def test_paths_covered(self):
+        self.assertEqual(sorted(self.baseline["paths"]), sorted(PATHS))
+
+    def test_timing_gate(self):
+        base = {"step": "boot", "latency": 0.1, "messages": 10, "config_writes": 1, "alloc_kb": 100}
+        slow = dict(base, latency=10, alloc_kb=10000)
+        baseline = {"calibration": None, "paths": {"path": [base]}}
+        self.assertEqual(len(compare("path", [slow], baseline, timing=True)), 2)
+        self.assertEqual(compare("path", [slow], baseline, timing=False), [])
+        more = dict(slow, messages=11)
+        self.assertEqual(len(compare("path", [more], baseline, timing=False)), 1)
+
+    def test_offline_defaults(self):
+        self.check("offline_defaults")
+
+    def test_custom_engines(self):
+        self.check("custom_engines")
+
+    def test_personal_backend(self):
+        self.check("personal_backend")
+
+    def test_wifi_skip(self):
+        self.check("wifi_skip")
@@ -0,0 +1,82 @@
+import unittest
+from threading import Event
+from time import monotonic, sleep
+
+from skill_ovos_setup.activation import ActivationScheduler
+
+
+class TestActivationScheduler(unittest.TestCase):
+    def scheduler(self, poll, **kwargs):
+        scheduler = ActivationScheduler(poll, **kwargs)
+        self.addCleanup(scheduler.stop)
+        return scheduler
+
+    def test_backoff(self):
+        scheduler = self.scheduler(None, initial=1, factor=2, max_interval=30, jitter=0)
+        self.assertEqual([scheduler.interval(a) for a in range(1, 8)], [1, 2, 4, 8, 16, 30, 30])
+
+    def test_jitter(self):
+        scheduler = self.scheduler(None, initial=10, jitter=0.25, seed=0)
+        waits = [scheduler.interval(1) for _ in range(100)]
+        self.assertTrue(all(7.5 <= w <= 12.5 for w in waits))
+        self.assertGreater(len(set(waits)), 1)
+
+    def test_polls_until_done(self):
+        polls = []
+        done = Event()
+
+        def poll():
+            polls.append(monotonic())
+            if len(polls) == 3:
+                done.set()
+                return True
+            return False
+
+        scheduler = self.scheduler(poll, initial=0.05, factor=2, jitter=0)
+        start = monotonic()
+        scheduler.start()
+        self.assertTrue(done.wait(2))
+        # right away, then after 0.05 and 0.1 seconds
+        self.assertLess(polls[0] - start, 0.05)
+        self.assertGreaterEqual(polls[2] - polls[1], 0.09)
+        sleep(0.3)
+        self.assertEqual(len(polls), 3)
+        self.assertFalse(scheduler.is_running)
+
+    def test_wake(self):
+        polls = []
+        scheduler = self.scheduler(lambda: polls.append(monotonic()), initial=60, jitter=0)
+        scheduler.start()
+        sleep(0.1)
+        self.assertEqual(len(polls), 1)
+        woken = monotonic()
+        scheduler.wake()
+        sleep(0.1)
+        self.assertEqual(len(polls), 2)
+        self.assertLess(polls[1] - woken, 0.1)
+
+    def test_stop(self):
+        polls = []
+        scheduler = self.scheduler(lambda: polls.append(1), initial=0.02, jitter=0)
+        scheduler.start()
+        sleep(0.1)
+        scheduler.stop()
+        count = len(polls)
+        sleep(0.1)
+        self.assertEqual(len(polls), count)
+        # a stopped schedule ignores wake()
+        scheduler.wake()
+        sleep(0.05)
+        self.assertEqual(len(polls), count)
+
+    def test_poll_errors(self):
+        polls = []
+
+        def poll():
+            polls.append(1)
+            raise RuntimeError("backend down")
+
+        scheduler = self.scheduler(poll, initial=0.02, factor=1, jitter=0)
+        scheduler.start()
+        sleep(0.15)
+        self.assertGreater(len(polls), 1)
@@ -0,0 +1,44 @@
+import unittest
+from unittest.mock import patch
+
+from ovos_backend_client.api import DeviceApi
+from ovos_backend_client.backends import BackendType
+from requests import Session
+from skill_ovos_setup.backend_session import BackendSessions
+from skill_ovos_setup.mock_backend import MockPersonalBackend
+
+
+class TestBackendSessions(unittest.TestCase):
+    def setUp(self):
+        self.backend = MockPersonalBackend(seed=0).start()
+        self.addCleanup(self.backend.stop)
+        self.sessions = BackendSessions(connect_timeout=1, read_timeout=2)
+        self.addCleanup(self.sessions.close)
+
+    def api(self, url=None):
+        return self.sessions.bind(DeviceApi(url or self.backend.url, backend_type=BackendType.PERSONAL))
+
+    def test_keep_alive(self):
+        data = self.api().get_code("state")
+        # set_api_url creates a new DeviceApi for the same host
+        self.api().activate("state", data["token"])
+        self.api(self.backend.url.replace("http://", "")).get_code("state")
+        self.assertEqual(self.backend.counts(), {"code": 2, "activate": 1})
+        self.assertEqual(self.backend.connections, 1)
+
+    def test_hosts(self):
+        self.assertIs(self.sessions.session("http://10.0.0.2:6712/v1"), self.sessions.session("10.0.0.2:6712"))
+        self.assertIsNot(self.sessions.session("http://10.0.0.2:6712"), self.sessions.session("http://10.0.0.3:6712"))
+
+    def test_timeouts(self):
+        with patch.object(Session, "get", wraps=self.sessions.session(self.backend.url).get) as get:
+            self.api().get_code("state")
+        self.assertEqual(get.call_args.kwargs["timeout"], (1, 2))
+        self.assertIn("Authorization", get.call_args.kwargs["headers"])
+
+    def test_close(self):
+        self.api().get_code("state")
+        self.sessions.close()
+        # a closed pool opens a new connection
+        self.api().get_code("state")
+        self.assertEqual(self.backend.connections, 2)
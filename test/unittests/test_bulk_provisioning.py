@@ -0,0 +1,39 @@
+import json
+import tempfile
+import unittest
+from os.path import join
+
+from skill_ovos_setup.bulk_provisioning import provision_all
+
+
+class TestBulkProvisioning(unittest.TestCase):
+    def test_profiles(self):
+        profiles = {
+            "offline.json": {"lang": "en-us", "backend": "offline",
+                             "stt": "offline", "tts": "offline_female"},
+            "personal.json": {"lang": "pt_PT", "backend": {"type": "personal", "url": "10.0.0.2:6712"},
+                              "stt": "online", "tts": {"module": "ovos-tts-plugin-dummy"}},
+            "broken.json": {"lang": "de-de", "backend": "offline",
+                            "stt": "offline", "tts": {"module": "not-installed"}},
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, profile in profiles.items():
+                with open(join(tmp, name), "w") as f:
+                    json.dump(profile, f)
+            results = {r["profile"]: r for r in provision_all(tmp, workers=2)}
+
+        self.assertEqual(sorted(results), sorted(profiles))
+        offline, personal, broken = results["offline.json"], results["personal.json"], results["broken.json"]
+        self.assertTrue(offline["ok"])
+        self.assertEqual(offline["states"], ["loading", "provisioning", "finished"])
+        self.assertEqual(offline["config"]["server"]["backend_type"], "offline")
+        self.assertIn("provisioning", offline["timeline"])
+        self.assertTrue(personal["ok"])
+        self.assertEqual(personal["config"]["lang"], "pt-pt")
+        self.assertEqual(personal["config"]["server"]["url"], "http://10.0.0.2:6712")
+        self.assertEqual(personal["config"]["tts"]["module"], "ovos-tts-plugin-dummy")
+        # the wizard would have to run on that device
+        self.assertFalse(broken["ok"])
+        self.assertTrue(broken["wizard"])
+        self.assertIn("not-installed", broken["error"])
+        self.assertEqual(broken["states"], ["loading", "provisioning"])
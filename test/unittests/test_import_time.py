@@ -0,0 +1,43 @@
+import subprocess
+import sys
+import unittest
+
+# modules the skill framework itself needs, their cost is not ours
+FRAMEWORK = "import ovos_workshop.skills, ovos_workshop.decorators, adapt.intent, ovos_bus_client"
+# only needed once the setup wizard runs
+LAZY_MODULES = ["ovos_backend_client.pairing", "ovos_backend_client.api",
+                "ovos_plugin_manager.utils.ui", "skill_ovos_setup.plugin_cache",
+                "skill_ovos_setup.plugin_health", "skill_ovos_setup.plugin_ranking",
+                "skill_ovos_setup.warmup", "skill_ovos_setup.model_prefetch",
+                "skill_ovos_setup.activation", "skill_ovos_setup.backend_session"]
+# milliseconds spent importing the skill on top of the framework
+IMPORT_BUDGET = 250
+
+
+def importtime(code):
+    """ {module: (self us, cumulative us)} for every module imported by code"""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                         capture_output=True, text=True, check=True).stderr
+    modules = {}
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative, name = line.split(":", 1)[1].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative))
+    return modules
+
+
+class TestImportTime(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.modules = importtime(f"{FRAMEWORK}; import skill_ovos_setup")
+
+    def test_lazy_imports(self):
+        framework_modules = importtime(FRAMEWORK)
+        for module in LAZY_MODULES:
+            if module not in framework_modules:
+                self.assertNotIn(module, self.modules)
+
+    def test_budget(self):
+        _, cumulative = self.modules["skill_ovos_setup"]
+        self.assertLess(cumulative / 1000, IMPORT_BUDGET)
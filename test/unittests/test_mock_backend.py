@@ -0,0 +1,38 @@
+import unittest
+
+from ovos_backend_client.api import DeviceApi
+from ovos_backend_client.backends import BackendType
+from requests import HTTPError
+from skill_ovos_setup.mock_backend import MockPersonalBackend
+
+
+class TestMockBackend(unittest.TestCase):
+    def setUp(self):
+        self.backend = MockPersonalBackend(seed=0, activate_after=1).start()
+        self.addCleanup(self.backend.stop)
+        self.api = DeviceApi(self.backend.url, backend_type=BackendType.PERSONAL)
+
+    def test_pairing(self):
+        data = self.api.get_code("state")
+        self.assertEqual(len(data["code"]), 6)
+        # the user did not enter the code yet
+        with self.assertRaises(HTTPError):
+            self.api.activate("state", data["token"])
+        identity = self.api.activate("state", data["token"])
+        self.assertEqual(identity["uuid"], "state")
+        self.assertIn("state", self.backend.devices)
+        self.assertEqual(self.backend.counts(), {"code": 1, "activate": 2})
+
+    def test_confirm(self):
+        data = self.api.get_code("state")
+        self.backend.confirm(data["code"])
+        self.assertEqual(self.api.activate("state", data["token"])["uuid"], "state")
+
+    def test_fail(self):
+        self.backend.fail("code", times=2, status=503)
+        for _ in range(2):
+            # get_code does not check the status, the error body is not json
+            with self.assertRaises((HTTPError, ValueError)):
+                self.api.get_code("state")
+        self.assertIn("code", self.api.get_code("state"))
+        self.assertEqual([r["status"] for r in self.backend.requests], [503, 503, 200])
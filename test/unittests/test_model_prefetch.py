@@ -0,0 +1,91 @@
+import hashlib
+import io
+import tempfile
+import unittest
+import zipfile
+from os.path import isdir, isfile, join
+from unittest.mock import MagicMock, patch
+
+from skill_ovos_setup.model_prefetch import ModelDownload, VoskModelPrefetch, find_vosk_model
+
+MODELS = [
+    {"lang": "en-us", "type": "small", "obsolete": "false", "size": 40, "name": "en-small"},
+    {"lang": "en-us", "type": "big", "obsolete": "false", "size": 1800, "name": "en-big"},
+    {"lang": "en-in", "type": "small", "obsolete": "false", "size": 36, "name": "en-in-small"},
+    {"lang": "pt", "type": "small", "obsolete": "true", "size": 31, "name": "pt-old"},
+    {"lang": "pt", "type": "small", "obsolete": "false", "size": 31, "name": "pt-small"},
+]
+
+
+def model_zip(name="vosk-model-small-xx"):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        z.writestr(f"{name}/conf/model.conf", "--min-active=200\n" * 500)
+        z.writestr(f"{name}/am/final.mdl", bytes(range(256)) * 64)
+    return buf.getvalue()
+
+
+class TestModelPrefetch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.data = model_zip()
+        self.src = join(self.tmp.name, "model.zip")
+        with open(self.src, "wb") as f:
+            f.write(self.data)
+
+    def test_find_model(self):
+        self.assertEqual(find_vosk_model("en_US", MODELS)["name"], "en-small")
+        self.assertEqual(find_vosk_model("pt-pt", MODELS)["name"], "pt-small")
+        self.assertIsNone(find_vosk_model("ja", MODELS))
+
+    def test_resume(self):
+        dst = join(self.tmp.name, "out.zip")
+        with open(dst + ".part", "wb") as f:
+            f.write(self.data[:1000])
+        progress = []
+        ModelDownload(self.src, dst, lambda done, total: progress.append((done, total)),
+                      chunk_size=512).run()
+        with open(dst, "rb") as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertFalse(isfile(dst + ".part"))
+        self.assertEqual(progress[0], (1512, len(self.data)))
+        self.assertEqual(progress[-1], (len(self.data), len(self.data)))
+
+    def test_resume_remote(self):
+        dst = join(self.tmp.name, "out.zip")
+        with open(dst + ".part", "wb") as f:
+            f.write(self.data[:1000])
+        response = MagicMock(status_code=206, headers={"Content-Length": str(len(self.data) - 1000)})
+        response.iter_content.return_value = [self.data[1000:]]
+        with patch("requests.get", return_value=response) as get:
+            ModelDownload("https://example.com/model.zip", dst).run()
+        self.assertEqual(get.call_args.kwargs["headers"], {"Range": "bytes=1000-"})
+        with open(dst, "rb") as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_fetch(self):
+        states = []
+        sha = hashlib.sha256(self.data).hexdigest()
+        prefetch = VoskModelPrefetch(join(self.tmp.name, "vosk"),
+                                     models={"en": {"url": "file://" + self.src, "sha256": sha}},
+                                     callback=lambda lang, state, progress: states.append(state))
+        path = prefetch.fetch("en-us")
+        self.assertTrue(isfile(join(path, "conf", "model.conf")))
+        self.assertEqual(states[-2:], ["verifying", "unpacking"])
+        self.assertFalse(isfile(path + ".zip"))
+        # already unpacked, nothing to do
+        states.clear()
+        self.assertEqual(prefetch.fetch("en-us"), path)
+        self.assertEqual(states, [])
+
+    def test_checksum_mismatch(self):
+        states = []
+        prefetch = VoskModelPrefetch(join(self.tmp.name, "vosk"),
+                                     models={"en": {"url": self.src, "md5": "0" * 32, "name": "bad"}},
+                                     callback=lambda lang, state, progress: states.append(state))
+        prefetch.start("en").join(5)
+        self.assertEqual(states[-1], "failed")
+        self.assertFalse(isdir(join(self.tmp.name, "vosk", "bad")))
+        # corrupt archives are not resumed
+        self.assertFalse(isfile(join(self.tmp.name, "vosk", "bad.zip")))
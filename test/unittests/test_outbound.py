@@ -0,0 +1,84 @@
+import unittest
+from threading import Event
+from time import monotonic
+
+from ovos_bus_client import Message
+from ovos_utils.messagebus import FakeBus
+from ovos_workshop.decorators.killable import AbortEvent
+from skill_ovos_setup.outbound import RECORD_STOP, SPEECH_STOP, OutboundBus, killable_menu
+
+
+class Menu:
+    def __init__(self, bus):
+        self.bus = bus
+        self.release = Event()
+
+    def _handle_killed_wait_response(self):
+        pass
+
+    @killable_menu(msg="test.menu.stop")
+    def handle_menu(self):
+        try:
+            self.release.wait(5)
+        except AbortEvent:
+            pass
+
+
+class TestOutboundBus(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeBus()
+        self.emitted = []
+        self.client.on("message", self.emitted.append)
+        self.bus = OutboundBus(self.client, coalesce_window=60)
+
+    def test_counted(self):
+        self.bus.emit(Message("speak"))
+        self.bus.emit(Message("speak"))
+        self.bus.emit(Message("gui.value.set"))
+        self.assertEqual(self.bus.stats()["sent"], {"speak": 2, "gui.value.set": 1})
+        self.assertEqual(self.bus.stats()["total_sent"], 3)
+        self.assertEqual(len(self.emitted), 3)
+        self.bus.reset_stats()
+        self.assertEqual(self.bus.stats()["total_sent"], 0)
+        # delegated to the wrapped client
+        self.assertEqual(self.bus, self.client)
+        self.assertIs(self.bus.ee, self.client.ee)
+
+    def test_coalesced(self):
+        self.assertTrue(self.bus.emit_stop(Message(SPEECH_STOP)))
+        self.assertFalse(self.bus.emit_stop(Message(SPEECH_STOP)))
+        self.assertTrue(self.bus.emit_stop(Message(RECORD_STOP)))
+        # new speech since the last stop, it must be stopped too
+        self.bus.emit(Message("speak"))
+        self.assertTrue(self.bus.emit_stop(Message(SPEECH_STOP)))
+        self.assertEqual(self.bus.stats()["dropped"], {SPEECH_STOP: 1})
+        self.assertEqual(self.bus.stats()["sent"][SPEECH_STOP], 2)
+
+    def test_window(self):
+        self.bus.coalesce_window = 0
+        self.assertTrue(self.bus.emit_stop(Message(SPEECH_STOP)))
+        self.assertTrue(self.bus.emit_stop(Message(SPEECH_STOP)))
+
+    def test_killable_menu(self):
+        menu = Menu(self.bus)
+        # nothing to stop
+        self.assertFalse(self.bus.emit_stop(Message("test.menu.stop")))
+        menu.handle_menu()
+        self.assertTrue(self.bus.is_running("test.menu.stop"))
+        self.assertTrue(self.bus.emit_stop(Message("test.menu.stop")))
+        # killed by the stop signal
+        deadline = monotonic() + 5
+        while self.bus.is_running("test.menu.stop") and monotonic() < deadline:
+            Event().wait(0.01)
+        self.assertFalse(self.bus.is_running("test.menu.stop"))
+        self.assertFalse(self.bus.emit_stop(Message("test.menu.stop")))
+        self.assertEqual(self.bus.stats()["dropped"], {"test.menu.stop": 2})
+
+    def test_menu_finished(self):
+        menu = Menu(self.bus)
+        menu.release.set()
+        menu.handle_menu()
+        deadline = monotonic() + 5
+        while self.bus.is_running("test.menu.stop") and monotonic() < deadline:
+            Event().wait(0.01)
+        self.assertFalse(self.bus.is_running("test.menu.stop"))
@@ -0,0 +1,104 @@
+import tempfile
+import unittest
+from os.path import isfile, join
+from unittest.mock import patch
+
+from ovos_plugin_manager.utils.ui import PluginTypes
+from skill_ovos_setup.plugin_cache import PluginOptionsCache, get_installed_fingerprint
+
+
+class TestPluginOptionsCache(unittest.TestCase):
+
+    def test_fingerprint(self):
+        self.assertEqual(get_installed_fingerprint(), get_installed_fingerprint())
+
+    @patch("skill_ovos_setup.plugin_cache.PluginUIHelper")
+    def test_cached(self, helper):
+        helper.get_config_options.return_value = [{"engine": "dummy"}]
+        cache = PluginOptionsCache()
+        opts = cache.get_config_options("en", PluginTypes.STT, ["bad"], "dummy")
+        self.assertEqual(opts, [{"engine": "dummy"}])
+        cache.get_config_options("en", PluginTypes.STT, ["bad"], "dummy")
+        self.assertEqual(helper.get_config_options.call_count, 1)
+
+        # different key triggers a new scan
+        cache.get_config_options("pt", PluginTypes.STT, ["bad"], "dummy")
+        self.assertEqual(helper.get_config_options.call_count, 2)
+
+        # returned values are copies
+        opts[0]["engine"] = "changed"
+        self.assertEqual(cache.get_config_options("en", PluginTypes.STT, ["bad"], "dummy"),
+                         [{"engine": "dummy"}])
+
+    @patch("skill_ovos_setup.plugin_cache.get_installed_fingerprint")
+    @patch("skill_ovos_setup.plugin_cache.PluginUIHelper")
+    def test_invalidation(self, helper, fingerprint):
+        helper.get_plugin_options.return_value = []
+        fingerprint.return_value = "a"
+        cache = PluginOptionsCache()
+        cache.get_plugin_options("en", PluginTypes.TTS)
+        cache.get_plugin_options("en", PluginTypes.TTS)
+        self.assertEqual(helper.get_plugin_options.call_count, 1)
+        fingerprint.return_value = "b"
+        cache.get_plugin_options("en", PluginTypes.TTS)
+        self.assertEqual(helper.get_plugin_options.call_count, 2)
+
+    @patch("skill_ovos_setup.plugin_cache.PluginUIHelper")
+    def test_prefetch(self, helper):
+        helper.get_config_options.return_value = []
+        cache = PluginOptionsCache()
+        cache.prefetch("en")
+        cache._prefetch_thread.join()
+        self.assertEqual(helper.get_config_options.call_count, 2)
+        helper.get_plugin_options.assert_not_called()
+        cache.get_config_options("en", PluginTypes.STT)
+        cache.get_menu_options("en", PluginTypes.TTS)
+        self.assertEqual(helper.get_config_options.call_count, 2)
+
+    @patch("skill_ovos_setup.plugin_cache.PluginUIHelper")
+    def test_menu_single_scan(self, helper):
+        helper.get_config_options.return_value = [
+            {"engine": "a", "plugin_name": "A", "offline": True, "gender": "male"},
+            {"engine": "b", "plugin_name": "B", "offline": False, "gender": "female"},
+            {"engine": "a", "plugin_name": "A", "offline": True, "gender": "female"}]
+        cache = PluginOptionsCache()
+        menu = cache.get_menu_options("en", PluginTypes.TTS, preferred="b", max_opts=2)
+        helper.get_config_options.assert_called_once()
+        helper.get_plugin_options.assert_not_called()
+        self.assertEqual(menu["count"], 3)
+        self.assertEqual(menu["plugin_count"], 2)
+        # preferred engine first, truncated to max_opts
+        self.assertEqual([o["engine"] for o in menu["options"]], ["b", "a"])
+        a, b = menu["plugins"]
+        self.assertEqual(len(a["options"]), 2)
+        self.assertTrue(a["supports_offline_mode"])
+        self.assertTrue(a["supports_male_voice"] and a["supports_female_voice"])
+        self.assertTrue(b["supports_online_mode"])
+        self.assertFalse(b["supports_male_voice"])
+
+    @patch("skill_ovos_setup.plugin_cache.PluginUIHelper")
+    def test_catalog(self, helper):
+        opt = {"engine": "dummy", "plugin_type": "stt", "lang": "en"}
+        cfg = {"module": "dummy", "meta": {}, "model": "small"}
+        helper.get_config_options.return_value = [opt]
+        helper.option2config.return_value = cfg
+        with tempfile.TemporaryDirectory() as tmp:
+            path = join(tmp, "plugin_catalog.json")
+            cache = PluginOptionsCache(path)
+            cache.get_config_options("en", PluginTypes.STT)
+            self.assertTrue(isfile(path))
+
+            # new process, PluginUIHelper knows nothing about previous scans
+            helper.reset_mock()
+            helper.option2config.return_value = {}
+            cache = PluginOptionsCache(path)
+            self.assertEqual(cache.get_config_options("en", PluginTypes.STT), [opt])
+            helper.get_config_options.assert_not_called()
+            self.assertEqual(cache.option2config(dict(opt)), cfg)
+
+            # catalog is ignored if installed packages changed
+            with patch("skill_ovos_setup.plugin_cache.get_installed_fingerprint",
+                       return_value="changed"):
+                cache = PluginOptionsCache(path)
+                cache.get_config_options("en", PluginTypes.STT)
+                helper.get_config_options.assert_called_once()
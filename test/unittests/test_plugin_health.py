@@ -0,0 +1,57 @@
+import json
+import tempfile
+import unittest
+from os.path import join
+from unittest.mock import patch
+
+from ovos_plugin_manager.utils.ui import PluginTypes
+from skill_ovos_setup.plugin_cache import PluginOptionsCache
+from skill_ovos_setup.plugin_health import PluginHealth, find_entry_point
+
+BROKEN = {"value": "skill_ovos_setup_missing_module:Plugin", "version": "1.0"}
+
+
+class TestPluginHealth(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = join(self.tmp.name, "plugin_health.json")
+
+    def test_installed(self):
+        health = PluginHealth(self.path)
+        self.assertIsNotNone(find_entry_point("ovos-tts-plugin-dummy", PluginTypes.TTS))
+        self.assertTrue(health.check("ovos-tts-plugin-dummy", PluginTypes.TTS))
+        self.assertFalse(health.check("ovos-tts-plugin-not-installed", PluginTypes.TTS))
+
+    def test_broken(self):
+        health = PluginHealth(self.path)
+        with patch("skill_ovos_setup.plugin_health.find_entry_point", return_value=BROKEN):
+            self.assertFalse(health.check("broken", PluginTypes.STT))
+        with open(self.path) as f:
+            result = json.load(f)["mycroft.plugin.stt:broken"]
+        self.assertEqual(result["version"], "1.0")
+        self.assertIn("ModuleNotFoundError", result["error"])
+
+    def test_cached_per_version(self):
+        health = PluginHealth(self.path)
+        with patch("skill_ovos_setup.plugin_health.find_entry_point", return_value=BROKEN):
+            health.check("broken", PluginTypes.STT)
+            with patch.object(PluginHealth, "_probe") as probe:
+                # new process, same version, no subprocess
+                self.assertFalse(PluginHealth(self.path).check("broken", PluginTypes.STT))
+                probe.assert_not_called()
+        # plugin upgraded, probed again
+        fixed = dict(BROKEN, value="json:JSONDecoder", version="1.1")
+        with patch("skill_ovos_setup.plugin_health.find_entry_point", return_value=fixed):
+            self.assertTrue(PluginHealth(self.path).check("broken", PluginTypes.STT))
+
+    @patch("skill_ovos_setup.plugin_cache.PluginUIHelper")
+    def test_menus_filtered(self, helper):
+        helper.get_config_options.return_value = [{"engine": "ovos-tts-plugin-dummy", "plugin_name": "Dummy"},
+                                                  {"engine": "not-installed", "plugin_name": "Missing"}]
+        cache = PluginOptionsCache(health=PluginHealth(self.path))
+        self.assertEqual([o["engine"] for o in cache.get_config_options("en", PluginTypes.TTS)],
+                         ["ovos-tts-plugin-dummy"])
+        menu = cache.get_menu_options("en", PluginTypes.TTS)
+        self.assertEqual(menu["count"], 1)
+        self.assertEqual([p["engine"] for p in menu["plugins"]], ["ovos-tts-plugin-dummy"])
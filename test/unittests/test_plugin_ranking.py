@@ -0,0 +1,85 @@
+import json
+import tempfile
+import unittest
+import wave
+from os.path import join
+from unittest.mock import MagicMock, patch
+
+from ovos_plugin_manager.utils.ui import PluginTypes
+from skill_ovos_setup import SetupManager
+from skill_ovos_setup.plugin_ranking import EngineRanking, write_fixture_wav
+
+SCORES = {
+    "mycroft.plugin.stt:fast": {"ok": True, "rtf": 0.2, "latency": 0.6, "rss_mb": 100},
+    "mycroft.plugin.stt:slow": {"ok": True, "rtf": 0.8, "latency": 2.4, "rss_mb": 100},
+    "mycroft.plugin.stt:too-slow": {"ok": True, "rtf": 1.5, "latency": 4.5, "rss_mb": 100},
+    "mycroft.plugin.stt:broken": {"ok": False, "error": "ImportError"},
+    "mycroft.plugin.tts:fast": {"ok": True, "rtf": 0.5, "latency": 0.1, "rss_mb": 50},
+    "mycroft.plugin.tts:huge": {"ok": True, "rtf": 0.1, "latency": 0.05, "rss_mb": 10 ** 6},
+}
+
+
+class TestEngineRanking(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = join(self.tmp.name, "engine_ranking.json")
+        with open(self.path, "w") as f:
+            json.dump(SCORES, f)
+
+    @patch("skill_ovos_setup.plugin_ranking.get_total_ram_mb", return_value=1024)
+    def test_rank(self, _):
+        ranking = EngineRanking(self.path)
+        # slower than real time, failed and oversized plugins do not fit
+        self.assertEqual(ranking.rank(PluginTypes.STT), ["fast", "slow"])
+        self.assertEqual(ranking.rank(PluginTypes.TTS), ["fast"])
+        self.assertEqual(ranking.best(PluginTypes.STT, {"slow", "too-slow"}), "slow")
+        self.assertIsNone(ranking.best(PluginTypes.STT, {"too-slow"}))
+
+    def test_cached_per_version(self):
+        ranking = EngineRanking(join(self.tmp.name, "new.json"))
+        result = {"version": "1.0", "lang": "en-us", "ok": True, "rtf": 0.1, "latency": 0.1, "rss_mb": 1}
+        ep = {"value": "dummy:STT", "version": "1.0"}
+        with patch("skill_ovos_setup.plugin_ranking.find_entry_point", return_value=ep), \
+                patch.object(EngineRanking, "_run", return_value=result) as run:
+            ranking.benchmark("dummy", PluginTypes.STT)
+            # new process, same version, no benchmark
+            EngineRanking(ranking.path).benchmark("dummy", PluginTypes.STT)
+            self.assertEqual(run.call_count, 1)
+            # plugin upgraded, measured again
+            ep["version"] = "1.1"
+            EngineRanking(ranking.path).benchmark("dummy", PluginTypes.STT)
+            self.assertEqual(run.call_count, 2)
+
+    def test_failed_benchmark(self):
+        # the dummy TTS is the OPM base class, it does not synthesize anything
+        ranking = EngineRanking(join(self.tmp.name, "new.json"))
+        result = ranking.benchmark("ovos-tts-plugin-dummy", PluginTypes.TTS)
+        self.assertFalse(result["ok"])
+        self.assertIn("no audio", result["error"])
+        self.assertIsNone(ranking.benchmark("not-installed", PluginTypes.TTS))
+
+    def test_fixture(self):
+        path = join(self.tmp.name, "fixture.wav")
+        write_fixture_wav(path, seconds=1.0)
+        with wave.open(path) as w:
+            self.assertEqual(w.getnframes(), w.getframerate())
+
+    @patch("skill_ovos_setup.plugin_ranking.get_total_ram_mb", return_value=1024)
+    def test_setup_defaults(self, _):
+        options = MagicMock()
+        options.option2config.side_effect = lambda opt, plugin_type: {"voice": opt["voice"]}
+        setup = SetupManager(None, options, ranking=EngineRanking(self.path))
+        setup.set_online_female_opt("pinned", {})
+        tts = [{"engine": "huge", "offline": True, "gender": "male", "voice": "a"},
+               {"engine": "fast", "offline": True, "gender": "male", "voice": "b"},
+               {"engine": "fast", "offline": False, "gender": "female", "voice": "c"}]
+        self.assertEqual(setup.pick_engine(PluginTypes.TTS, tts)["voice"], "b")
+        setup.rank_defaults(tts_options=tts)
+        self.assertEqual(setup.offline_male_tts_module, "fast")
+        self.assertEqual(setup._offline_male["fast"], {"voice": "b"})
+        # nothing ranked for these, hardcoded defaults are kept
+        self.assertEqual(setup.offline_female_tts_module, "ovos-tts-plugin-pico")
+        self.assertEqual(setup.online_stt_module, "ovos-stt-plugin-server")
+        # set from skill settings
+        self.assertEqual(setup.online_female_tts_module, "pinned")
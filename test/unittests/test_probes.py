@@ -0,0 +1,52 @@
+import unittest
+from threading import Event
+from time import monotonic, sleep
+
+from skill_ovos_setup.probes import ProbeCache
+
+
+class TestProbeCache(unittest.TestCase):
+    def setUp(self):
+        self.probes = ProbeCache(ttl=60, timeout=2)
+        self.addCleanup(self.probes.shutdown)
+
+    def test_concurrent(self):
+        def slow():
+            sleep(0.5)
+            return True
+
+        start = monotonic()
+        self.probes.submit("a", slow)
+        self.probes.submit("b", slow)
+        self.assertTrue(self.probes.get("a", slow))
+        self.assertTrue(self.probes.get("b", slow))
+        # bounded by the slowest probe, not the sum
+        self.assertLess(monotonic() - start, 0.9)
+
+    def test_cached(self):
+        calls = []
+        self.probes.get("a", calls.append, 1)
+        self.probes.get("a", calls.append, 1)
+        self.assertEqual(calls, [1])
+        self.probes.invalidate("a")
+        self.probes.get("a", calls.append, 1)
+        self.assertEqual(calls, [1, 1])
+
+    def test_expired(self):
+        self.probes.ttl = 0
+        calls = []
+        self.probes.get("a", calls.append, 1)
+        self.probes.get("a", calls.append, 1)
+        self.assertEqual(calls, [1, 1])
+
+    def test_timeout(self):
+        release = Event()
+        self.assertEqual(self.probes.get("a", release.wait, timeout=0.1,
+                                         default="offline"), "offline")
+        release.set()
+
+    def test_error(self):
+        def broken():
+            raise ConnectionError
+
+        self.assertFalse(self.probes.get("a", broken))
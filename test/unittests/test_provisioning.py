@@ -0,0 +1,130 @@
+import json
+import tempfile
+import unittest
+from os.path import join
+from unittest.mock import patch
+
+from ovos_config.models import LocalConf
+from ovos_utils.messagebus import FakeBus
+from skill_ovos_setup import PairingSkill, SetupManager, SetupState
+from skill_ovos_setup.provisioning import load_profile, validate_profile
+
+PROFILE = {"lang": "pt_PT",
+           "backend": {"type": "personal", "url": "192.168.1.2:6712"},
+           "stt": "offline",
+           "tts": {"module": "ovos-tts-plugin-dummy", "ovos-tts-plugin-dummy": {"voice": "x"}}}
+
+
+class TestProfile(unittest.TestCase):
+    def test_validate(self):
+        profile = validate_profile(PROFILE)
+        self.assertEqual(profile["lang"], "pt-pt")
+        self.assertEqual(profile["backend"]["url"], "http://192.168.1.2:6712")
+        self.assertEqual(validate_profile(dict(PROFILE, backend="offline"))["backend"],
+                         {"type": "offline"})
+
+    def test_invalid(self):
+        for bad in ({"lang": "en-us"},
+                    dict(PROFILE, backend="selene"),
+                    dict(PROFILE, backend={"type": "personal"}),
+                    dict(PROFILE, stt="fast"),
+                    dict(PROFILE, tts={"voice": "x"})):
+            with self.assertRaises(ValueError):
+                validate_profile(bad)
+
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = join(tmp, "provisioning.json")
+            self.assertIsNone(load_profile(path))
+            with open(path, "w") as f:
+                json.dump(PROFILE, f)
+            self.assertEqual(load_profile(path)["stt"], "offline")
+
+
+class TestProvisioning(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.conf = join(self.tmp.name, "mycroft.conf")
+        self.profile = join(self.tmp.name, "provisioning.json")
+        for p in (patch("skill_ovos_setup.MycroftUserConfig", side_effect=lambda: LocalConf(self.conf)),
+                  patch.object(PairingSkill, "provisioning_profile_path", self.profile),
+                  patch.object(PairingSkill, "setup_marker_path", join(self.tmp.name, "marker.json")),
+                  patch.object(PairingSkill, "is_setup_complete", lambda self: False),
+                  patch("skill_ovos_setup.warmup.EngineWarmup.start"),
+                  patch("skill_ovos_setup.is_connected", return_value=False)):
+            p.start()
+            self.addCleanup(p.stop)
+        self.bus = FakeBus()
+        self.messages = []
+        self.bus.on("message", lambda m: self.messages.append(json.loads(m)["type"]))
+
+    def start_skill(self):
+        skill = PairingSkill()
+        skill._startup(self.bus, "skill-ovos-setup.openvoiceos")
+        self.addCleanup(skill.shutdown)
+        return skill
+
+    def read_config(self):
+        with open(self.conf) as f:
+            return json.load(f)
+
+    def test_single_commit(self):
+        setup = SetupManager(self.bus)
+        setup.apply_profile(validate_profile(PROFILE))
+        self.assertEqual(self.messages.count("configuration.patch"), 1)
+        config = self.read_config()
+        self.assertEqual(config["lang"], "pt-pt")
+        self.assertEqual(config["server"]["url"], "http://192.168.1.2:6712")
+        self.assertEqual(config["stt"]["module"], setup.offline_stt_module)
+        self.assertEqual(config["tts"], PROFILE["tts"])
+
+    @patch("ovos_backend_client.identity.IdentityManager.save")
+    @patch("ovos_backend_client.api.DeviceApi")
+    def test_headless(self, api, save):
+        with open(self.profile, "w") as f:
+            json.dump(PROFILE, f)
+        api.return_value.get_code.return_value = {"code": "ABCDEF", "token": "t"}
+        api.return_value.activate.return_value = {"uuid": "u"}
+        skill = self.start_skill()
+
+        self.assertEqual(skill.state, SetupState.FINISHED)
+        api.assert_called_once_with("http://192.168.1.2:6712", backend_type="personal")
+        save.assert_called_once_with({"uuid": "u"})
+        # no wizard, no pages, no dialogs
+        self.assertIsNone(skill.pairing)
+        for msg_type in ("gui.page.show", "speak", "mycroft.not.paired"):
+            self.assertNotIn(msg_type, self.messages)
+        self.assertEqual(self.messages.count("configuration.patch"), 1)
+        self.assertIn("mycroft.paired", self.messages)
+        self.assertIn("ovos.setup.finished", self.messages)
+        self.assertEqual(skill.settings["selected_tts"], "ovos-tts-plugin-dummy")
+
+    @patch("ovos_backend_client.identity.IdentityManager.save")
+    @patch("ovos_backend_client.api.DeviceApi")
+    def test_activation_failed(self, api, save):
+        with open(self.conf, "w") as f:
+            json.dump({"lang": "en-us"}, f)
+        with open(self.profile, "w") as f:
+            json.dump(PROFILE, f)
+        api.return_value.get_code.return_value = {"code": "ABCDEF", "token": "t"}
+        api.return_value.activate.return_value = {}
+        skill = self.start_skill()
+        # the device is not left half configured, the wizard runs instead
+        self.assertEqual(self.read_config(), {"lang": "en-us"})
+        self.assertNotIn("configuration.patch", self.messages)
+        self.assertNotIn("mycroft.paired", self.messages)
+        self.assertIn("ovos.setup.provisioning.failed", self.messages)
+        save.assert_not_called()
+        self.assertIsNotNone(skill.pairing)
+
+    @patch("ovos_backend_client.api.DeviceApi")
+    def test_fallback(self, api):
+        with open(self.profile, "w") as f:
+            json.dump(dict(PROFILE, tts={"module": "not-installed"}), f)
+        skill = self.start_skill()
+        api.assert_not_called()
+        self.assertNotIn("configuration.patch", self.messages)
+        # the wizard runs instead
+        self.assertIsNotNone(skill.pairing)
+        self.assertEqual(skill.state, SetupState.SELECTING_WIFI)
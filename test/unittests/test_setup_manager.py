@@ -0,0 +1,115 @@
+import json
+import os
+import stat
+import tempfile
+import unittest
+from os.path import join
+from threading import Event
+from unittest.mock import patch
+
+from ovos_config.models import LocalConf
+from ovos_utils.file_utils import FileWatcher
+from ovos_utils.messagebus import FakeBus
+from skill_ovos_setup import SetupManager
+
+
+class TestSetupManager(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = join(self.tmp.name, "mycroft.conf")
+        patcher = patch("skill_ovos_setup.MycroftUserConfig",
+                        side_effect=lambda: LocalConf(self.path))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+        self.bus = FakeBus()
+        self.patches = []
+        self.bus.on("configuration.patch",
+                    lambda m: self.patches.append(m.data["config"]))
+        self.setup = SetupManager(self.bus)
+
+    def read_config(self):
+        with open(self.path) as f:
+            return json.load(f)
+
+    def test_single_change(self):
+        self.setup.change_to_offline_stt()
+        self.assertEqual(len(self.patches), 1)
+        self.assertEqual(self.read_config()["stt"]["module"],
+                         self.setup.offline_stt_module)
+
+    def test_transaction(self):
+        with self.setup.transaction():
+            self.setup.change_to_no_backend()
+            self.setup.change_to_offline_stt()
+            with self.setup.transaction():
+                self.setup.change_to_offline_male()
+            self.assertEqual(self.patches, [])
+        self.assertEqual(len(self.patches), 1)
+        config = self.read_config()
+        self.assertEqual(config["server"]["backend_type"], "offline")
+        self.assertEqual(config["stt"]["module"], self.setup.offline_stt_module)
+        self.assertEqual(config["tts"]["module"], self.setup.offline_male_tts_module)
+        self.assertEqual(self.patches[0], config)
+        self.assertEqual(self.setup.configured_engines,
+                         {"stt": self.setup.offline_stt_module,
+                          "tts": self.setup.offline_male_tts_module})
+
+    def test_transaction_rollback(self):
+        with self.assertRaises(RuntimeError):
+            with self.setup.transaction():
+                self.setup.change_to_no_backend()
+                raise RuntimeError("failed")
+        self.assertEqual(self.patches, [])
+        # next transaction does not inherit discarded changes
+        with self.setup.transaction():
+            self.setup.change_to_offline_stt()
+        self.assertNotIn("server", self.patches[0])
+
+    def test_vosk_model(self):
+        stt = {"module": "ovos-stt-plugin-server", "fallback_module": "ovos-stt-plugin-vosk"}
+        self.setup.set_vosk_model("/models/vosk-en", stt)
+        self.assertEqual(self.setup._offline_stt["ovos-stt-plugin-vosk-streaming"]["model"],
+                         "/models/vosk-en")
+        # the fallback of the running config had no model
+        self.assertEqual(self.read_config()["stt"]["ovos-stt-plugin-vosk"], {"model": "/models/vosk-en"})
+        # selecting vosk from the menu uses the prefetched model
+        self.setup.change_stt({"engine": "ovos-stt-plugin-vosk-streaming"})
+        self.assertEqual(self.read_config()["stt"]["ovos-stt-plugin-vosk-streaming"]["model"],
+                         "/models/vosk-en")
+
+    def test_file_mode(self):
+        # the user config is a symlink to a world readable file
+        target = join(self.tmp.name, "shared.conf")
+        with open(target, "w") as f:
+            json.dump({"lang": "en-us"}, f)
+        os.chmod(target, 0o644)
+        os.symlink(target, self.path)
+        self.setup.change_to_offline_stt()
+        self.assertTrue(os.path.islink(self.path))
+        self.assertEqual(stat.S_IMODE(os.stat(target).st_mode), 0o644)
+        with open(target) as f:
+            config = json.load(f)
+        self.assertEqual(config["lang"], "en-us")
+        self.assertEqual(config["stt"]["module"], self.setup.offline_stt_module)
+
+    def test_new_file_mode(self):
+        umask = os.umask(0o022)
+        self.addCleanup(os.umask, umask)
+        self.setup.change_to_offline_stt()
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o644)
+
+    def test_file_watcher(self):
+        # services reload their engines from the Configuration file watcher
+        with open(self.path, "w") as f:
+            json.dump({"lang": "en-us"}, f)
+        changed = Event()
+        # Configuration._on_file_change ignores other files of the folder
+        watcher = FileWatcher([self.path], lambda path: path == self.path and changed.set())
+        self.addCleanup(watcher.shutdown)
+        with self.setup.transaction():
+            self.setup.change_to_offline_stt()
+            self.setup.change_to_offline_male()
+        self.assertTrue(changed.wait(5))
@@ -0,0 +1,290 @@
+import json
+import os
+import stat
+import tempfile
+import unittest
+from os.path import join
+from time import monotonic
+from unittest.mock import patch
+
+from ovos_backend_client.identity import IdentityManager
+from ovos_bus_client import Message
+from ovos_config.models import LocalConf
+from ovos_utils.messagebus import FakeBus
+from skill_ovos_setup import PairingSkill, SetupState, SETUP_TRANSITIONS
+
+
+class TestSetupState(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.bus = FakeBus()
+        cls.messages = []
+        cls.bus.on("message", cls.messages.append)
+        with patch("skill_ovos_setup.is_connected", return_value=False), \
+                patch.object(PairingSkill, "is_setup_complete", lambda self: False):
+            cls.skill = PairingSkill()
+            cls.skill._startup(cls.bus, "skill-ovos-setup.openvoiceos")
+
+    def setUp(self):
+        self.skill._state = SetupState.SELECTING_BACKEND
+        self.messages.clear()
+
+    def emitted(self):
+        return [json.loads(m)["type"] for m in self.messages]
+
+    def test_table_complete(self):
+        for state in SetupState:
+            self.assertIn(state, SETUP_TRANSITIONS)
+            self.assertTrue(SETUP_TRANSITIONS[state] <= set(SetupState))
+
+    def test_valid_transition(self):
+        self.skill.bus.started("pairing.backend.menu.stop")
+        self.addCleanup(self.skill.bus.finished, "pairing.backend.menu.stop")
+        self.assertTrue(self.skill.transition(SetupState.QUICK_ENGINE_CONFIG))
+        self.assertEqual(self.skill.state, SetupState.QUICK_ENGINE_CONFIG)
+        emitted = self.emitted()
+        # exit actions stop the stale backend menus, only the running ones
+        self.assertIn("pairing.backend.menu.stop", emitted)
+        self.assertNotIn("pairing.confirmation.stop", emitted)
+        self.assertIn("ovos.setup.state", emitted)
+        self.assertIn(SetupState.SELECTING_BACKEND, self.skill.state_durations)
+
+    def test_invalid_transition(self):
+        self.skill._state = SetupState.FINISHED
+        self.assertFalse(self.skill.transition(SetupState.SELECTING_TTS))
+        self.assertEqual(self.skill.state, SetupState.FINISHED)
+        self.assertEqual(self.emitted(), [])
+
+    def test_same_state(self):
+        self.assertTrue(self.skill.transition(SetupState.SELECTING_BACKEND))
+        self.assertEqual(self.emitted(), [])
+
+    def test_stale_continuations_cancelled(self):
+        timer = self.skill.schedule_continuation(60, self.fail)
+        self.skill.transition(SetupState.PAIRING)
+        self.assertTrue(timer.finished.is_set())
+
+    def test_timeline(self):
+        self.skill.timeline.reset()
+        self.skill.transition(SetupState.SELECTING_STT)
+        with self.skill.timeline.measure("speech", "stt.intro"):
+            pass
+        self.skill.end_setup(success=True)
+        emitted = self.emitted()
+        self.assertIn("ovos.setup.finished", emitted)
+        self.assertIn("ovos.setup.timeline", emitted)
+        timeline = json.loads(self.messages[emitted.index("ovos.setup.timeline")])["data"]
+        self.assertTrue(timeline["success"])
+        self.assertEqual([(e["kind"], e["name"]) for e in timeline["events"]],
+                         [("state", "backend"), ("speech", "stt.intro"), ("state", "stt")])
+        self.assertIn("state", timeline["totals"])
+        self.assertGreater(timeline["messages"]["sent"]["ovos.setup.finished"], 0)
+        # next setup run starts a new timeline
+        self.assertEqual(self.skill.timeline.events, [])
+
+    def test_timeline_history(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(self.skill.file_system, "path", tmp), \
+                patch.object(PairingSkill, "timeline_history", 2):
+            for success in (False, False, True):
+                self.skill.report_timeline(success)
+            with open(join(tmp, "setup_timeline.jsonl")) as f:
+                runs = [json.loads(line) for line in f]
+        self.assertEqual([r["success"] for r in runs], [False, True])
+
+    def test_gui_batched(self):
+        self.skill.show_pairing_success()
+        emitted = self.emitted()
+        # one session data message followed by the page change
+        self.assertEqual(emitted.count("gui.value.set"), 1)
+        self.assertEqual(emitted.index("gui.value.set") + 1, emitted.index("gui.page.show"))
+        data = json.loads(self.messages[emitted.index("gui.value.set")])["data"]
+        self.assertEqual(data["status"], "Success")
+        self.assertEqual(data["state"], "Status")
+
+        self.messages.clear()
+        with self.skill.gui_batch() as gui:
+            gui["a"] = 1
+            gui["b"] = 2
+            self.assertEqual(self.emitted(), [])
+        self.assertEqual(self.emitted(), ["gui.value.set"])
+
+    def test_engines_warmed_up(self):
+        self.skill.setup.configured_engines = {"tts": "ovos-tts-plugin-dummy"}
+        with patch("skill_ovos_setup.warmup.EngineWarmup.start") as start:
+            self.skill.end_setup(success=True)
+        start.assert_called_once_with({"tts": "ovos-tts-plugin-dummy"})
+        self.assertEqual(self.skill.setup.configured_engines, {})
+
+    def test_model_progress(self):
+        self.skill._on_model_progress("en-us", "downloading", 0.501)
+        self.skill._on_model_progress("en-us", "downloading", 0.509)
+        with patch.object(self.skill.setup, "set_vosk_model") as set_model:
+            self.skill._on_model_progress("en-us", "ready", "/models/vosk-en")
+        set_model.assert_called_once()
+        progress = [json.loads(m)["data"] for m in self.messages
+                    if json.loads(m)["type"] == "ovos.setup.model.progress"]
+        self.assertEqual([(p["state"], p["progress"]) for p in progress],
+                         [("downloading", 50), ("ready", 100)])
+        self.assertEqual(self.skill.gui["model_state"], "ready")
+
+    def test_stop_signal(self):
+        self.addCleanup(setattr, self.skill.bus, "coalesce_window", self.skill.bus.coalesce_window)
+        self.skill.bus.coalesce_window = 0
+        # no menu is running, only its stop signal is dropped
+        self.skill.send_stop_signal("pairing.stt.menu.stop")
+        self.assertEqual(self.emitted(), ["mycroft.audio.speech.stop", "recognizer_loop:record_stop",
+                                          "mycroft.audio.speech.stop"])
+
+        self.messages.clear()
+        self.skill.bus.started("pairing.stt.menu.stop")
+        self.addCleanup(self.skill.bus.finished, "pairing.stt.menu.stop")
+        self.skill.send_stop_signal("pairing.stt.menu.stop")
+        # the same stop again within the coalesce window is redundant
+        self.skill.bus.coalesce_window = 60
+        self.skill.send_stop_signal("pairing.stt.menu.stop")
+        emitted = self.emitted()
+        self.assertEqual(emitted.count("pairing.stt.menu.stop"), 1)
+        # speech started after the first stop is still cut off
+        self.assertEqual(emitted.count("mycroft.audio.speech.stop"), 4)
+        self.assertEqual(emitted[-1], "mycroft.audio.speech.stop")
+
+    @patch("skill_ovos_setup.is_classic_core", return_value=True)
+    def test_stop_signal_classic_core(self, _):
+        self.skill.send_stop_signal()
+        emitted = self.emitted()
+        # mycroft-core can only end recording by muting the mic
+        self.assertLess(emitted.index("mycroft.mic.mute"), emitted.index("mycroft.mic.unmute"))
+        self.assertEqual(emitted[-1], "mycroft.audio.speech.stop")
+
+    def test_bus_stats(self):
+        replies = []
+        self.bus.once("ovos.setup.bus.stats", replies.append)
+        self.bus.emit(Message("ovos.setup.bus.stats.get"))
+        self.assertGreater(replies[0].data["sent"]["register_vocab"], 0)
+        self.assertEqual(replies[0].data["total_sent"] + 1, self.skill.bus.stats()["total_sent"])
+
+    def test_settings_file_mode(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(self.skill.settings, "path", join(tmp, "settings.json")):
+            with open(self.skill.settings.path, "w") as f:
+                json.dump({}, f)
+            os.chmod(self.skill.settings.path, 0o644)
+            self.skill.settings["test_mode"] = True
+            self.addCleanup(self.skill.settings.pop, "test_mode")
+            self.skill.store_settings()
+            self.skill.flush_settings()
+            with open(self.skill.settings.path) as f:
+                self.assertTrue(json.load(f)["test_mode"])
+            self.assertEqual(stat.S_IMODE(os.stat(self.skill.settings.path).st_mode), 0o644)
+
+    def test_translations_lazy(self):
+        self.skill.translations.clear()
+        self.assertEqual(self.skill._translate("code", "A"), "'A' as in Alpha")
+        self.assertEqual(list(self.skill.translations), [(self.skill.lang, "code")])
+        self.assertEqual(self.skill._translate("unknown"), {})
+
+
+class TestFastPath(unittest.TestCase):
+    def test_setup_complete(self):
+        bus = FakeBus()
+        messages = []
+        bus.on("message", lambda m: messages.append(json.loads(m)["type"]))
+        with patch.object(PairingSkill, "is_setup_complete", lambda self: True), \
+                patch("ovos_backend_client.api.DeviceApi"), \
+                patch("skill_ovos_setup.is_connected") as connected:
+            skill = PairingSkill()
+            skill._startup(bus, "skill-ovos-setup.openvoiceos")
+        self.addCleanup(skill.shutdown)
+        # no probes, no wizard
+        connected.assert_not_called()
+        self.assertIsNone(skill.pairing)
+        self.assertIsNone(skill.setup)
+        self.assertIn("ovos.setup.finished", messages)
+        # no setup ran, no timeline is reported
+        self.assertNotIn("ovos.setup.timeline", messages)
+        self.assertEqual(skill.state, SetupState.FINISHED)
+
+        # setup triggered again, wizard is loaded on demand
+        with patch.object(skill, "handle_pairing"):
+            skill.not_paired(Message("mycroft.not.paired"))
+        self.assertIsNotNone(skill.pairing)
+        self.assertIsNotNone(skill.setup)
+
+    def test_marker(self):
+        with patch("skill_ovos_setup.is_connected", return_value=False), \
+                patch.object(PairingSkill, "is_setup_complete", lambda self: False):
+            skill = PairingSkill()
+            skill._startup(FakeBus(), "skill-ovos-setup.openvoiceos")
+        self.addCleanup(skill.shutdown)
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(PairingSkill, "setup_marker_path", join(tmp, "marker.json")), \
+                patch.object(IdentityManager, "IDENTITY_FILE", join(tmp, "identity2.json")):
+            with open(IdentityManager.IDENTITY_FILE, "w") as f:
+                json.dump({"uuid": "device-1"}, f)
+            skill.settings["first_setup"] = False
+            self.assertFalse(skill.is_setup_complete())
+            skill._write_setup_marker()
+            self.assertTrue(skill.is_setup_complete())
+            # paired again, a different device identity
+            with open(IdentityManager.IDENTITY_FILE, "w") as f:
+                json.dump({"uuid": "device-2"}, f)
+            self.assertFalse(skill.is_setup_complete())
+            skill._write_setup_marker()
+            self.assertTrue(skill.is_setup_complete())
+            # identity deleted, the device has to pair again
+            os.remove(IdentityManager.IDENTITY_FILE)
+            self.assertFalse(skill.is_setup_complete())
+            with open(IdentityManager.IDENTITY_FILE, "w") as f:
+                json.dump({"uuid": "device-2"}, f)
+            # backend changed since setup completed
+            with patch.object(skill, "config_core",
+                              {"server": {"backend_type": "personal", "url": "http://127.0.0.1"}}):
+                self.assertFalse(skill.is_setup_complete())
+            skill.settings["first_setup"] = True
+            self.assertFalse(skill.is_setup_complete())
+
+
+class TestMycroftReady(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.conf = join(self.tmp.name, "mycroft.conf")
+        # the offline backend writes an identity, settings are stored at the end
+        for p in (patch.dict(os.environ, {"XDG_CONFIG_HOME": join(self.tmp.name, "config")}),
+                  patch.object(IdentityManager, "IDENTITY_FILE", join(self.tmp.name, "identity2.json")),
+                  patch.object(IdentityManager, "_IdentityManager__identity", None),
+                  patch("skill_ovos_setup.MycroftUserConfig", side_effect=lambda: LocalConf(self.conf)),
+                  patch.object(PairingSkill, "setup_marker_path", join(self.tmp.name, "marker.json")),
+                  patch.object(PairingSkill, "is_setup_complete", lambda self: False),
+                  patch("skill_ovos_setup.warmup.EngineWarmup.start"),
+                  patch("skill_ovos_setup.is_connected", return_value=False),
+                  patch("ovos_backend_client.api.DeviceApi")):
+            p.start()
+            self.addCleanup(p.stop)
+        self.bus = FakeBus()
+        self.messages = []
+        self.bus.on("message", lambda m: self.messages.append(json.loads(m)["type"]))
+
+    def test_ready_mid_setup(self):
+        skill = PairingSkill()
+        skill._startup(self.bus, "skill-ovos-setup.openvoiceos")
+        self.addCleanup(skill.shutdown)
+        skill.not_paired(Message("mycroft.not.paired"))
+        skill.handle_backend_menu()
+        self.assertEqual(skill.state, SetupState.SELECTING_BACKEND)
+
+        # skills finished loading while the wizard is shown
+        self.bus.emit(Message("mycroft.ready"))
+        self.assertTrue(skill.mycroft_ready)
+        self.assertEqual(skill.state, SetupState.SELECTING_BACKEND)
+
+        # offline path still completes
+        skill.handle_backend_confirmation_event(Message("", {"backend": "offline"}))
+        self.assertEqual(skill.state, SetupState.QUICK_ENGINE_CONFIG)
+        skill.handle_customize_engines_continue(Message("", {"stt_engine": "ovos-stt-plugin-dummy",
+                                                             "tts_engine": "ovos-tts-plugin-dummy"}))
+        self.assertEqual(skill.state, SetupState.FINISHED)
+        self.assertIn("ovos.setup.finished", self.messages)
+        with open(self.conf) as f:
+            self.assertEqual(json.load(f)["server"]["backend_type"], "offline")
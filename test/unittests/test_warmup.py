@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from os.path import join
+from threading import get_ident
+from unittest.mock import patch
+
+from ovos_utils.messagebus import FakeBus
+from skill_ovos_setup.warmup import EngineWarmup, engine_files, warmup_engine
+
+
+class TestEngineWarmup(unittest.TestCase):
+    def test_reported_on_bus(self):
+        bus = FakeBus()
+        messages = []
+        bus.on("ovos.setup.warmup.started", messages.append)
+        bus.on("ovos.setup.warmup.finished", messages.append)
+        results = {"stt": {"ok": True, "error": "", "skipped": False, "seconds": 1.0},
+                   "tts": {"ok": False, "error": "ImportError", "skipped": False, "seconds": 0.1}}
+        with patch("skill_ovos_setup.warmup.warmup_engine",
+                   side_effect=lambda kind, module, config: results[kind]):
+            warmup = EngineWarmup(bus)
+            warmup.start({"stt": "stt-plugin", "tts": "tts-plugin"}, {}).join(5)
+        self.assertFalse(warmup.running)
+        self.assertEqual([m.msg_type for m in messages],
+                         ["ovos.setup.warmup.started", "ovos.setup.warmup.finished"])
+        finished = messages[1].data
+        self.assertTrue(finished["stt"]["ok"])
+        self.assertEqual(finished["stt"]["module"], "stt-plugin")
+        self.assertEqual(finished["tts"]["error"], "ImportError")
+
+    def test_one_at_a_time(self):
+        threads = []
+
+        def _warmup(kind, module, config):
+            threads.append(get_ident())
+            return {"ok": True, "error": "", "skipped": False, "seconds": 0}
+
+        with patch("skill_ovos_setup.warmup.warmup_engine", side_effect=_warmup):
+            EngineWarmup(FakeBus()).start({"stt": "a", "tts": "b"}, {}).join(5)
+        # a single worker, engines never warm up side by side
+        self.assertEqual(len(threads), 2)
+        self.assertEqual(len(set(threads)), 1)
+
+    def test_nothing_to_do(self):
+        self.assertIsNone(EngineWarmup(FakeBus()).start({}))
+
+    def test_model_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(join(tmp, "model", "am"))
+            for name in ("model/am/final.mdl", "model/conf", "voice.onnx"):
+                with open(join(tmp, name), "wb") as f:
+                    f.write(b"0" * 10)
+            cfg = {"model": join(tmp, "model"), "voice": join(tmp, "voice.onnx"),
+                   "lang": "en-us", "missing": join(tmp, "missing")}
+            self.assertEqual(len(engine_files(cfg)), 3)
+
+            config = {"stt": {"ovos-stt-plugin-vosk": cfg}}
+            result = warmup_engine("stt", "ovos-stt-plugin-vosk", config)
+            self.assertTrue(result["ok"])
+            self.assertEqual(result["bytes"], 30)
+            # the engine is never loaded
+            with patch("ovos_plugin_manager.stt.OVOSSTTFactory.create") as create:
+                warmup_engine("stt", "ovos-stt-plugin-vosk", config)
+            create.assert_not_called()
+
+    def test_nothing_to_fetch(self):
+        # online engines and engines without local model paths are skipped
+        config = {"tts": {"module": "ovos-tts-plugin-server",
+                          "ovos-tts-plugin-server": {"host": "https://tts.example.org"}}}
+        result = warmup_engine("tts", "ovos-tts-plugin-server", config)
+        self.assertTrue(result["ok"])
+        self.assertTrue(result["skipped"])
+        self.assertEqual(result["bytes"], 0)
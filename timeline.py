@@ -0,0 +1,65 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from contextlib import contextmanager
+from threading import Lock
+from time import monotonic, time
+
+
+class SetupTimeline:
+    """ per step latency of a setup run
+
+    every event is stored with monotonic start/end offsets (seconds since
+    the timeline started), kinds used by the skill are
+    "state", "plugins", "config", "speech" and "probe" """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.started = time()
+        self._t0 = monotonic()
+        self.events = []
+
+    def reset(self):
+        with self._lock:
+            self.started = time()
+            self._t0 = monotonic()
+            self.events = []
+
+    def record(self, kind: str, name: str, start: float, end: float = None, **data):
+        """ store an event, start/end are monotonic() timestamps """
+        end = monotonic() if end is None else end
+        event = {"kind": kind, "name": name,
+                 "start": round(start - self._t0, 4),
+                 "duration": round(end - start, 4)}
+        if data:
+            event["data"] = data
+        with self._lock:
+            self.events.append(event)
+
+    @contextmanager
+    def measure(self, kind: str, name: str, **data):
+        start = monotonic()
+        try:
+            yield
+        finally:
+            self.record(kind, name, start, **data)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            events = list(self.events)
+        totals = {}
+        for e in events:
+            totals[e["kind"]] = round(totals.get(e["kind"], 0) + e["duration"], 4)
+        return {"started": self.started,
+                "duration": round(monotonic() - self._t0, 4),
+                "totals": totals,
+                "events": events}
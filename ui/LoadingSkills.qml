@@ -43,6 +43,18 @@ Item {
                 color: Kirigami.Theme.highlightColor
             }
 
+            ProgressBar {
+                id: modelProgress
+                Layout.fillWidth: true
+                Layout.alignment: Qt.AlignHCenter
+                // speech model still downloading in the background, see model_prefetch.py
+                visible: ["downloading", "verifying", "unpacking"].indexOf(sessionData.model_state) >= 0
+                from: 0
+                to: 100
+                indeterminate: sessionData.model_state !== "downloading" || sessionData.model_progress < 0
+                value: sessionData.model_progress > 0 ? sessionData.model_progress : 0
+            }
+
             LottieAnimation {
                 id: statusIcon
                 visible: true
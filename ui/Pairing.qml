@@ -87,6 +87,46 @@ Item {
                         text: root.code
                     }
                 }
+
+                Button {
+                    id: btnCodeEntered
+                    Layout.fillWidth: true
+                    Layout.preferredHeight: Mycroft.Units.gridUnit * 3
+
+                    background: Rectangle {
+                        color: btnCodeEntered.down ? "transparent" : Kirigami.Theme.highlightColor
+                        border.width: 3
+                        border.color: btnCodeEntered.activeFocus || btnCodeEntered.hovered ? Kirigami.Theme.textColor : Qt.darker(Kirigami.Theme.highlightColor, 1.2)
+                        radius: 10
+
+                        Rectangle {
+                            width: parent.width - 12
+                            height: parent.height - 12
+                            anchors.centerIn: parent
+                            color: btnCodeEntered.down ? Kirigami.Theme.highlightColor : Qt.darker(Kirigami.Theme.backgroundColor, 1.25)
+                            radius: 5
+                        }
+                    }
+
+                    contentItem: Kirigami.Heading {
+                        level: 3
+                        wrapMode: Text.WordWrap
+                        font.bold: true
+                        color: Kirigami.Theme.textColor
+                        text: qsTr("I entered the code")
+                        verticalAlignment: Text.AlignVCenter
+                        horizontalAlignment: Text.AlignHCenter
+                    }
+
+                    Keys.onReturnPressed: {
+                        clicked()
+                    }
+
+                    onClicked: {
+                        Mycroft.SoundEffects.playClickedSound(Qt.resolvedUrl("sounds/clicked.wav"))
+                        triggerGuiEvent("mycroft.device.pairing.confirm", {})
+                    }
+                }
             }
         }
     }
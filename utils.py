@@ -0,0 +1,73 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import json
+import os
+import shutil
+from os.path import dirname, isfile, realpath
+from tempfile import NamedTemporaryFile
+
+
+def _umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+def write_json_atomic(path: str, data, **kwargs):
+    """ write json to a temporary file and rename it over path,
+    readers never see a partially written file
+
+    a symlinked path is written through to its target, the mode of an
+    existing file is kept and a new file gets the umask default
+
+    NOTE: FileWatcher does not report renames, do not use for files that
+    other processes watch"""
+    path = realpath(path)
+    folder = dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with NamedTemporaryFile("w", dir=folder or ".", prefix=".tmp_",
+                            suffix=".json", delete=False, encoding="utf-8") as f:
+        try:
+            json.dump(data, f, **kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+            if isfile(path):
+                shutil.copymode(path, f.name)
+            else:
+                os.chmod(f.name, 0o666 & ~_umask())
+        except Exception:
+            os.remove(f.name)
+            raise
+    os.replace(f.name, path)
+
+
+def append_jsonl(path: str, data, max_lines: int = None):
+    """ append data as a single line of a JSONL log, only the last
+    max_lines lines are kept if given """
+    folder = dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    line = json.dumps(data, separators=(",", ":")) + "\n"
+    if not max_lines:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+        return
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        lines = []
+    lines = (lines + [line])[-max_lines:]
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(lines)
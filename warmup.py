@@ -0,0 +1,112 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import os
+from os.path import isabs, isdir, isfile, join
+from threading import Thread
+from time import monotonic
+
+from ovos_bus_client import Message
+from ovos_utils.log import LOG
+
+CHUNK_SIZE = 1 << 20
+
+
+def engine_files(engine_config: dict) -> list:
+    """ local model files an engine config points at, folders are walked """
+    files = []
+    for value in engine_config.values():
+        if not isinstance(value, str) or not isabs(value):
+            continue
+        if isfile(value):
+            files.append(value)
+        elif isdir(value):
+            for root, _, names in os.walk(value):
+                files += [join(root, name) for name in sorted(names)]
+    return files
+
+
+def prime_file(path: str) -> int:
+    """ get path into the page cache without keeping it in memory,
+    returns its size"""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if hasattr(os, "posix_fadvise"):
+            # readahead by the kernel, nothing is copied into the process
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        else:
+            while f.read(CHUNK_SIZE):
+                pass
+    return size
+
+
+def warmup_engine(kind: str, module: str, config: dict) -> dict:
+    """ prime the model files of the configured "stt" or "tts" engine
+
+    engines are not loaded, the services load their own instance while
+    skills load and doing it here too would double peak memory, the vosk
+    model is downloaded before setup ends, see model_prefetch.py"""
+    start = monotonic()
+    result = {"ok": True, "error": "", "skipped": False, "bytes": 0}
+    files = engine_files((config.get(kind) or {}).get(module) or {})
+    if not files:
+        result["skipped"] = True  # nothing on disk the config knows of
+    for path in files:
+        try:
+            result["bytes"] += prime_file(path)
+        except OSError as e:
+            result["ok"] = False
+            result["error"] = f"{path}: {e}"
+            break
+    result["seconds"] = round(monotonic() - start, 3)
+    return result
+
+
+class EngineWarmup:
+    """ warm up freshly configured engines in the background
+
+    engines are handled one at a time, emits ovos.setup.warmup.started
+    when it begins and ovos.setup.warmup.finished with a result per engine
+    when done"""
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.thread = None
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def _run(self, engines: dict, config: dict):
+        if config is None:
+            from ovos_config.models import MycroftUserConfig
+            config = MycroftUserConfig()
+        results = {}
+        for kind, module in engines.items():
+            result = results[kind] = dict(warmup_engine(kind, module, config), module=module)
+            if result["skipped"]:
+                LOG.debug(f"{kind} engine {module} has no model files to warm up")
+            elif result["ok"]:
+                LOG.info(f"{kind} engine {module} warmed up in {result['seconds']}s")
+            else:
+                LOG.warning(f"{kind} engine {module} failed to warm up: {result['error']}")
+        self.bus.emit(Message("ovos.setup.warmup.finished", results))
+
+    def start(self, engines: dict, config: dict = None):
+        """ engines: {"stt"/"tts": module}, only those are warmed up,
+        config defaults to the user mycroft.conf setup wrote them to"""
+        if not engines:
+            return None
+        self.bus.emit(Message("ovos.setup.warmup.started", {"engines": engines}))
+        self.thread = Thread(target=self._run, args=(dict(engines), config), daemon=True)
+        self.thread.start()
+        return self.thread